@@ -72,6 +72,14 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.get_full_name()} ({self.get_role_display()})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded role so role changes can be detected on save
+        # without re-reading the row (None when the role was deferred)
+        instance._old_role = instance.__dict__.get('role')
+        return instance
+    
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
     
@@ -0,0 +1,66 @@
+"""
+Request-scoped buffering of Analytics rows.
+
+Signal handlers record analytics through record_analytics(). Inside a request
+wrapped by AnalyticsBufferMiddleware the rows are collected and inserted with
+one bulk_create when the response goes out; anywhere else (Celery tasks,
+management commands, the shell) they are inserted immediately.
+"""
+import threading
+from functools import partial
+
+from django.db import transaction
+
+from .models import Analytics
+
+_local = threading.local()
+
+
+class AnalyticsBuffer:
+    """Unsaved Analytics rows waiting to be bulk inserted"""
+    batch_size = 500
+    
+    def __init__(self):
+        self.rows = []
+    
+    def append(self, row):
+        self.rows.append(row)
+    
+    def flush(self):
+        rows, self.rows = self.rows, []
+        if rows:
+            Analytics.objects.bulk_create(rows, batch_size=self.batch_size)
+        return len(rows)
+
+
+def get_buffer():
+    """The active request's buffer, or None outside a buffered request"""
+    return getattr(_local, 'buffer', None)
+
+
+def start_buffer():
+    _local.buffer = AnalyticsBuffer()
+    return _local.buffer
+
+
+def end_buffer():
+    """Detach the active buffer and insert whatever it collected"""
+    buffer = get_buffer()
+    _local.buffer = None
+    return buffer.flush() if buffer is not None else 0
+
+
+def record_analytics(**fields):
+    """
+    Record an Analytics row, buffered when a request buffer is active.
+    
+    Buffered rows join the buffer only once the surrounding transaction
+    commits, so analytics for rolled-back writes are never inserted.
+    """
+    row = Analytics(**fields)
+    buffer = get_buffer()
+    if buffer is None:
+        row.save()
+    else:
+        transaction.on_commit(partial(buffer.append, row))
+    return row
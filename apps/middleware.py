@@ -3,6 +3,8 @@ from django.core.cache import cache
 from django.http import JsonResponse
 from django.utils import timezone
 from apps.accounts.models import UserSession
+from apps.analytics.buffer import start_buffer, end_buffer
+from apps.progress.coalesce import start_collecting, end_collecting
 import logging
 import time
 
@@ -171,3 +173,41 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
             response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With'
         
         return response
+
+
+class AnalyticsBufferMiddleware(MiddlewareMixin):
+    """
+    Middleware to batch the Analytics rows signal handlers record during a
+    request into a single bulk insert when the response is returned.
+    """
+    
+    def process_request(self, request):
+        start_buffer()
+        return None
+    
+    def process_response(self, request, response):
+        try:
+            end_buffer()
+        except Exception as e:
+            logger.error(f"Error flushing analytics buffer: {e}")
+        
+        return response
+
+
+class ProgressUpdateMiddleware(MiddlewareMixin):
+    """
+    Middleware to coalesce the progress recomputes signal handlers schedule
+    during a request into a single Celery task.
+    """
+    
+    def process_request(self, request):
+        start_collecting()
+        return None
+    
+    def process_response(self, request, response):
+        try:
+            end_collecting()
+        except Exception as e:
+            logger.error(f"Error queueing progress updates: {e}")
+        
+        return response
@@ -1,10 +1,55 @@
 """
 Notifications models for Learning Cloud.
 """
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 from apps.accounts.models import User
 
+UNREAD_COUNT_CACHE_KEY = 'unread_count_{}'
+UNREAD_COUNT_CACHE_TIMEOUT = 300
+
+
+def get_unread_count(user_id):
+    """A user's unread notification count, cached and kept current by signals"""
+    count = cache.get_or_set(
+        UNREAD_COUNT_CACHE_KEY.format(user_id),
+        lambda: Notification.objects.filter(user_id=user_id, is_read=False).count(),
+        UNREAD_COUNT_CACHE_TIMEOUT
+    )
+    # Concurrent decrements can briefly undershoot
+    return max(count, 0)
+
+
+def adjust_unread_count(user_id, delta):
+    """Shift a cached unread count in place; a missing key is recounted on read"""
+    try:
+        cache.incr(UNREAD_COUNT_CACHE_KEY.format(user_id), delta)
+    except ValueError:
+        pass
+
+
+class NotificationQuerySet(models.QuerySet):
+    """QuerySet helpers for notifications"""
+    
+    def mark_read(self):
+        """
+        Mark every unread notification in the queryset as read with one UPDATE.
+        
+        update() sends no post_save, so the affected users' cached unread
+        counts are dropped here in a single batch. Prefer this over calling
+        mark_as_read() in a loop.
+        """
+        unread = self.filter(is_read=False)
+        user_ids = list(unread.values_list('user_id', flat=True).distinct())
+        if not user_ids:
+            return 0
+        
+        now = timezone.now()
+        updated = unread.update(is_read=True, read_at=now, updated_at=now)
+        cache.delete_many([UNREAD_COUNT_CACHE_KEY.format(user_id) for user_id in user_ids])
+        return updated
+
 
 class Notification(models.Model):
     """Model for user notifications"""
@@ -53,6 +98,8 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = NotificationQuerySet.as_manager()
+    
     class Meta:
         db_table = 'notifications'
         indexes = [
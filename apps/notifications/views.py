@@ -5,10 +5,9 @@ from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Q, Count
-from django.utils import timezone
 from .models import (
     Notification, NotificationTemplate, NotificationPreference,
-    NotificationLog, NotificationCampaign
+    NotificationLog, NotificationCampaign, get_unread_count
 )
 from .serializers import (
     NotificationSerializer, NotificationTemplateSerializer,
@@ -110,10 +109,7 @@ def mark_all_notifications_read(request):
     if notification_type:
         queryset = queryset.filter(notification_type=notification_type)
     
-    updated_count = queryset.update(
-        is_read=True,
-        read_at=timezone.now()
-    )
+    updated_count = queryset.mark_read()
     
     return Response({
         'message': f'{updated_count} notifications marked as read'
@@ -127,10 +123,7 @@ def unread_notification_count(request):
     user = request.user
     
     # Get total unread count
-    total_unread = Notification.objects.filter(
-        user=user,
-        is_read=False
-    ).count()
+    total_unread = get_unread_count(user.id)
     
     # Get unread count by type
     unread_by_type = Notification.objects.filter(
@@ -1,6 +1,8 @@
 """
 Admin configuration for progress app.
 """
+import json
+
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
@@ -10,6 +12,11 @@ from .models import (
 )
 
 
+def payload_display(obj):
+    """Pretty-print a decoded compressed JSON payload for read-only display"""
+    return format_html('<pre>{}</pre>', json.dumps(obj.payload, indent=2, ensure_ascii=False))
+
+
 @admin.register(StudentProgress)
 class StudentProgressAdmin(admin.ModelAdmin):
     """StudentProgress admin"""
@@ -160,9 +167,13 @@ class ProgressReportAdmin(admin.ModelAdmin):
     ]
     list_filter = ['report_type', 'generated_at', 'is_sent']
     search_fields = ['student__username', 'student__email']
-    readonly_fields = ['generated_at']
+    readonly_fields = ['payload_display', 'generated_at']
     ordering = ['-generated_at']
     
+    def payload_display(self, obj):
+        return payload_display(obj)
+    payload_display.short_description = 'Data'
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('student')
 
@@ -173,9 +184,13 @@ class ParentDashboardAdmin(admin.ModelAdmin):
     list_display = ['parent', 'child', 'last_updated']
     list_filter = ['last_updated']
     search_fields = ['parent__username', 'parent__email', 'child__username', 'child__email']
-    readonly_fields = ['last_updated']
+    readonly_fields = ['payload_display', 'last_updated']
     ordering = ['-last_updated']
     
+    def payload_display(self, obj):
+        return payload_display(obj)
+    payload_display.short_description = 'Data'
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('parent', 'child')
 
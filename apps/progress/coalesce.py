@@ -0,0 +1,66 @@
+"""
+Request-scoped coalescing of progress recomputation.
+
+Views and signal handlers mark students whose progress changed through
+mark_student_dirty(). Inside a request wrapped by ProgressUpdateMiddleware
+the marks are collected and a single process_progress_updates task is queued
+when the response goes out; anywhere else the task is queued as soon as the
+surrounding transaction commits.
+"""
+import threading
+from functools import partial
+
+from django.db import transaction
+
+from apps.tasks import process_progress_updates
+
+_local = threading.local()
+
+
+def get_dirty_students():
+    """The active request's {student_id: pending update} map, or None"""
+    return getattr(_local, 'dirty_students', None)
+
+
+def start_collecting():
+    _local.dirty_students = {}
+    return _local.dirty_students
+
+
+def _mark(dirty, student_id, subject_ids, full):
+    entry = dirty.setdefault(student_id, {'full': False, 'subject_ids': set()})
+    entry['full'] = entry['full'] or full
+    entry['subject_ids'].update(subject_ids)
+
+
+def _dispatch(dirty):
+    updates = [
+        [student_id, entry['full'], sorted(entry['subject_ids'])]
+        for student_id, entry in dirty.items()
+    ]
+    process_progress_updates.delay(updates)
+
+
+def end_collecting():
+    """Detach the active collection and queue one task for everything in it"""
+    dirty = get_dirty_students()
+    _local.dirty_students = None
+    if dirty:
+        _dispatch(dirty)
+    return len(dirty) if dirty else 0
+
+
+def mark_student_dirty(student_id, subject_ids=(), full=True):
+    """
+    Schedule a progress recompute for a student once the transaction commits.
+
+    subject_ids are the subjects whose progress should be recalculated;
+    full=False only refreshes the learning streak.
+    """
+    dirty = get_dirty_students()
+    if dirty is None:
+        dirty = {}
+        _mark(dirty, student_id, subject_ids, full)
+        transaction.on_commit(partial(_dispatch, dirty))
+    else:
+        transaction.on_commit(partial(_mark, dirty, student_id, set(subject_ids), full))
@@ -0,0 +1,62 @@
+"""
+ETag and cache-key support for read-only progress endpoints.
+
+Each student has a progress version in the cache that is bumped whenever one
+of their progress-related rows or their profile is saved. A shared version
+covers data nested into every student's payloads (subjects, schools). The
+versions, the requesting user and the current date (weekly/monthly windows
+and streaks roll over daily) make up the ETag, so an unchanged response
+costs one cache read. Cached payloads embed the same versions in their key
+and so never need deleting.
+"""
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.accounts.models import User
+
+PROGRESS_VERSION_KEY = "progress_version_{}"
+SHARED_PROGRESS_VERSION_KEY = "progress_version_shared"
+
+
+def bump_progress_version(student_id):
+    """Invalidate the ETags of every progress view for a student"""
+    version = time.time_ns()
+    cache.set(PROGRESS_VERSION_KEY.format(student_id), version, None)
+    return version
+
+
+def bump_shared_progress_version():
+    """Invalidate the ETags of every progress view for every student"""
+    version = time.time_ns()
+    cache.set(SHARED_PROGRESS_VERSION_KEY, version, None)
+    return version
+
+
+def get_progress_version(student_id):
+    """Return the student's current progress version, creating one if needed"""
+    key = PROGRESS_VERSION_KEY.format(student_id)
+    versions = cache.get_many([key, SHARED_PROGRESS_VERSION_KEY])
+    version = versions.get(key) or bump_progress_version(student_id)
+    shared = versions.get(SHARED_PROGRESS_VERSION_KEY) or bump_shared_progress_version()
+    return f"{version}.{shared}"
+
+
+def progress_cache_key(name, student_id, *parts):
+    """Cache key for a payload derived from a student's progress"""
+    version = get_progress_version(student_id)
+    return ":".join(str(part) for part in (name, *parts, student_id, version))
+
+
+def progress_etag(request, *args, **kwargs):
+    """ETag for views over the user's own progress (or a child's, by child_id)"""
+    student_id = kwargs.get('child_id') or request.user.pk
+    if student_id != request.user.pk and not (
+        request.user.is_parent()
+        and User.objects.filter(pk=student_id, parent_id=request.user.pk).exists()
+    ):
+        # No ETag, so the view runs and returns its 403/404 instead of a 304
+        return None
+    version = get_progress_version(student_id)
+    return f"{request.user.pk}-{student_id}-{version}-{timezone.now().date().isoformat()}"
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+def _percentage(part, total):
+    if total > 0:
+        return (part * 10000 + total // 2) // total / 100
+    return 0
+
+
+def backfill_percentages(apps, schema_editor):
+    SubjectProgress = apps.get_model('progress', 'SubjectProgress')
+    GradeProgress = apps.get_model('progress', 'GradeProgress')
+
+    subject_rows = []
+    for progress in SubjectProgress.objects.all().iterator(chunk_size=1000):
+        progress.completion_percentage = _percentage(progress.completed_lessons, progress.total_lessons)
+        subject_rows.append(progress)
+    SubjectProgress.objects.bulk_update(subject_rows, ['completion_percentage'], batch_size=1000)
+
+    grade_rows = []
+    for progress in GradeProgress.objects.all().iterator(chunk_size=1000):
+        progress.subject_completion_percentage = _percentage(progress.completed_subjects, progress.total_subjects)
+        progress.lesson_completion_percentage = _percentage(progress.completed_lessons, progress.total_lessons)
+        progress.quiz_pass_percentage = _percentage(progress.passed_quizzes, progress.total_quizzes)
+        grade_rows.append(progress)
+    GradeProgress.objects.bulk_update(
+        grade_rows,
+        ['subject_completion_percentage', 'lesson_completion_percentage', 'quiz_pass_percentage'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subjectprogress',
+            name='completion_percentage',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gradeprogress',
+            name='subject_completion_percentage',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gradeprogress',
+            name='lesson_completion_percentage',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gradeprogress',
+            name='quiz_pass_percentage',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_percentages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-16 09:30
+
+import zlib
+
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+def compress_json(value):
+    # Frozen copy of apps.progress.models.compress_json
+    return zlib.compress(orjson.dumps(value, default=DjangoJSONEncoder().default))
+
+
+def compress_existing_data(apps, schema_editor):
+    ProgressReport = apps.get_model('progress', 'ProgressReport')
+    ParentDashboard = apps.get_model('progress', 'ParentDashboard')
+
+    for model in (ProgressReport, ParentDashboard):
+        rows = []
+        for row in model.objects.filter(data_z__isnull=True).iterator(chunk_size=1000):
+            row.data_z = compress_json(row.data)
+            rows.append(row)
+        model.objects.bulk_update(rows, ['data_z'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0002_denormalized_percentages'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='progressreport',
+            name='data',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='progressreport',
+            name='data_z',
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='parentdashboard',
+            name='data_z',
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(compress_existing_data, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0003_compressed_report_data'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentprogress',
+            index=models.Index(fields=['student', '-updated_at'], name='student_pro_student_a265ca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progressmilestone',
+            index=models.Index(fields=['student', '-achieved_at'], name='progress_mi_student_8755a3_idx'),
+        ),
+    ]
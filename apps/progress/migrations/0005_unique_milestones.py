@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-16 10:30
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_milestones(apps, schema_editor):
+    ProgressMilestone = apps.get_model('progress', 'ProgressMilestone')
+
+    duplicates = ProgressMilestone.objects.values(
+        'student', 'milestone_type', 'title'
+    ).annotate(first_id=Min('id'), total=Count('id')).filter(total__gt=1).order_by()
+
+    for row in duplicates.iterator():
+        ProgressMilestone.objects.filter(
+            student=row['student'],
+            milestone_type=row['milestone_type'],
+            title=row['title'],
+        ).exclude(id=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0004_progress_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_milestones, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='progressmilestone',
+            unique_together={('student', 'milestone_type', 'title')},
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-16 11:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0005_unique_milestones'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='studentprogress',
+            name='student_pro_student_c8437a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='progressmilestone',
+            name='progress_mi_student_8f2a40_idx',
+        ),
+    ]
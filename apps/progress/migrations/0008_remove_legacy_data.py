@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-16 12:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0007_drop_redundant_student_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='progressreport',
+            name='data',
+        ),
+        migrations.RemoveField(
+            model_name='parentdashboard',
+            name='data',
+        ),
+    ]
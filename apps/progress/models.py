@@ -2,7 +2,14 @@
 Progress tracking models for Learning Cloud.
 Optimized for handling 20M+ students with efficient queries and indexing.
 """
-from django.db import models
+import zlib
+from functools import partial
+
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from apps.accounts.models import User
@@ -10,6 +17,92 @@ from apps.content.models import Lesson, Subject, Chapter
 from apps.quizzes.models import Quiz, QuizAttempt
 
 
+def percentage(part, total):
+    """Return part/total as a percentage rounded to 2 places (0 when total is 0)"""
+    # Integer math keeps this off the float/round() path; adding half the
+    # divisor rounds the second decimal half up.
+    if total > 0:
+        return (part * 10000 + total // 2) // total / 100
+    return 0
+
+
+_json_encoder = DjangoJSONEncoder()
+
+
+def compress_json(value):
+    """Encode value as zlib-compressed JSON bytes"""
+    return zlib.compress(orjson.dumps(value, default=_json_encoder.default))
+
+
+def decompress_json(raw):
+    """Decode bytes produced by compress_json (None for an empty column)"""
+    if not raw:
+        return None
+    return orjson.loads(zlib.decompress(raw))
+
+
+def compressed_json_property(field_name):
+    """
+    Property exposing a compressed JSON BinaryField as a plain Python value.
+    
+    The column is decoded on first access and the result is kept on the
+    instance until the raw bytes change (assignment or refresh_from_db).
+    """
+    cache_name = f'_{field_name}_decoded'
+    
+    def getter(self):
+        raw = getattr(self, field_name)
+        cached = self.__dict__.get(cache_name)
+        if cached is None or cached[0] is not raw:
+            cached = (raw, decompress_json(raw))
+            self.__dict__[cache_name] = cached
+        return cached[1]
+    
+    def setter(self, value):
+        raw = compress_json(value)
+        setattr(self, field_name, raw)
+        self.__dict__[cache_name] = (raw, value)
+    
+    return property(getter, setter)
+
+
+class StudentProgressQuerySet(models.QuerySet):
+    """QuerySet helpers for lesson progress"""
+    
+    def mark_completed(self):
+        """
+        Complete every not-yet-completed row in the queryset with one UPDATE.
+        
+        For bulk and import paths: update() sends no signals, so per-lesson
+        analytics and notifications are skipped, and only the affected
+        students' progress recompute and ETag bump are scheduled. Use
+        StudentProgress.mark_completed() and save() when the full signal
+        cascade is wanted.
+        """
+        # Imported here because the coalescing task module imports these models
+        from apps.progress.coalesce import mark_student_dirty
+        from apps.progress.etags import bump_progress_version
+        
+        pending = self.exclude(status='COMPLETED')
+        subjects_by_student = {}
+        for student_id, subject_id in pending.values_list('student_id', 'lesson__chapter__subject_id'):
+            subjects_by_student.setdefault(student_id, set()).add(subject_id)
+        if not subjects_by_student:
+            return 0
+        
+        now = timezone.now()
+        updated = pending.update(
+            status='COMPLETED',
+            completed_at=now,
+            started_at=Coalesce('started_at', Value(now)),
+            updated_at=now
+        )
+        for student_id, subject_ids in subjects_by_student.items():
+            mark_student_dirty(student_id, subject_ids)
+            transaction.on_commit(partial(bump_progress_version, student_id))
+        return updated
+
+
 class StudentProgress(models.Model):
     """Model for tracking student progress through lessons"""
     PROGRESS_STATUS = [
@@ -31,41 +124,51 @@ class StudentProgress(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StudentProgressQuerySet.as_manager()
+    
     class Meta:
         db_table = 'student_progress'
         unique_together = ['student', 'lesson']
+        # Lookups by student alone use the composite indexes below
         indexes = [
-            models.Index(fields=['student']),
             models.Index(fields=['lesson']),
             models.Index(fields=['status']),
             models.Index(fields=['completed_at']),
             models.Index(fields=['student', 'status']),
             models.Index(fields=['student', 'completed_at']),
+            models.Index(fields=['student', '-updated_at']),
         ]
         ordering = ['-updated_at']
     
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.lesson.title} ({self.status})"
     
-    def mark_started(self):
-        """Mark lesson as started"""
-        if self.status == 'NOT_STARTED':
-            self.status = 'IN_PROGRESS'
-            self.started_at = timezone.now()
-            self.save(update_fields=['status', 'started_at', 'updated_at'])
+    def mark_started(self, commit=True):
+        """Mark lesson as started; returns the changed fields"""
+        if self.status != 'NOT_STARTED':
+            return []
+        self.status = 'IN_PROGRESS'
+        self.started_at = timezone.now()
+        return self._commit_fields(['status', 'started_at'], commit)
     
-    def mark_completed(self, score=None):
-        """Mark lesson as completed"""
+    def mark_completed(self, score=None, commit=True):
+        """Mark lesson as completed; returns the changed fields"""
         self.status = 'COMPLETED'
         self.completed_at = timezone.now()
         if score is not None:
             self.score = score
-        self.save(update_fields=['status', 'completed_at', 'score', 'updated_at'])
+        return self._commit_fields(['status', 'completed_at', 'score'], commit)
     
-    def update_time_spent(self, additional_time):
-        """Update time spent on lesson"""
+    def update_time_spent(self, additional_time, commit=True):
+        """Update time spent on lesson; returns the changed fields"""
         self.time_spent += additional_time
-        self.save(update_fields=['time_spent', 'updated_at'])
+        return self._commit_fields(['time_spent'], commit)
+    
+    def _commit_fields(self, fields, commit):
+        # With commit=False the caller batches these fields into its own save()
+        if commit:
+            self.save(update_fields=fields + ['updated_at'])
+        return fields
 
 
 class LearningStreak(models.Model):
@@ -114,7 +217,10 @@ class LearningStreak(models.Model):
             self.streak_start_date = activity_date
         
         self.last_activity_date = activity_date
-        self.save()
+        self.save(update_fields=[
+            'current_streak', 'longest_streak', 'last_activity_date',
+            'streak_start_date', 'updated_at'
+        ])
 
 
 class SubjectProgress(models.Model):
@@ -125,6 +231,7 @@ class SubjectProgress(models.Model):
     completed_lessons = models.IntegerField(default=0)
     total_time_spent = models.IntegerField(default=0)  # Total time in seconds
     average_score = models.FloatField(default=0)
+    completion_percentage = models.FloatField(default=0)  # Kept in sync on save
     last_activity = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -143,6 +250,14 @@ class SubjectProgress(models.Model):
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.subject.name}"
     
+    def save(self, *args, **kwargs):
+        """Store the completion percentage alongside the lesson counters"""
+        self.completion_percentage = percentage(self.completed_lessons, self.total_lessons)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'completion_percentage'}
+        super().save(*args, **kwargs)
+    
     def calculate_progress(self):
         """Calculate and update progress statistics"""
         # Get all lessons for this subject
@@ -153,30 +268,25 @@ class SubjectProgress(models.Model):
         
         self.total_lessons = lessons.count()
         
-        # Get completed lessons
-        completed_progress = StudentProgress.objects.filter(
+        # Get completed lessons, time spent, average score and last activity
+        totals = StudentProgress.objects.filter(
             student=self.student,
             lesson__in=lessons,
             status='COMPLETED'
+        ).aggregate(
+            completed=models.Count('id'),
+            total_time=models.Sum('time_spent'),
+            avg_score=models.Avg('score'),
+            last_completed=models.Max('completed_at')
         )
         
-        self.completed_lessons = completed_progress.count()
-        
-        # Calculate total time spent
-        self.total_time_spent = completed_progress.aggregate(
-            total_time=models.Sum('time_spent')
-        )['total_time'] or 0
-        
-        # Calculate average score
-        scores = completed_progress.exclude(score__isnull=True).values_list('score', flat=True)
-        if scores:
-            self.average_score = sum(scores) / len(scores)
-        else:
-            self.average_score = 0
+        self.completed_lessons = totals['completed']
+        self.total_time_spent = totals['total_time'] or 0
+        self.average_score = totals['avg_score'] or 0
         
         # Update last activity
-        if completed_progress.exists():
-            self.last_activity = completed_progress.order_by('-completed_at').first().completed_at
+        if totals['last_completed'] is not None:
+            self.last_activity = totals['last_completed']
         
         self.save()
 
@@ -195,6 +305,10 @@ class GradeProgress(models.Model):
     passed_quizzes = models.IntegerField(default=0)
     total_time_spent = models.IntegerField(default=0)  # Total time in seconds
     overall_average = models.FloatField(default=0)
+    # Percentages kept in sync on save
+    subject_completion_percentage = models.FloatField(default=0)
+    lesson_completion_percentage = models.FloatField(default=0)
+    quiz_pass_percentage = models.FloatField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -211,6 +325,20 @@ class GradeProgress(models.Model):
     def __str__(self):
         return f"{self.student.get_full_name()} - Grade {self.grade_level}"
     
+    def save(self, *args, **kwargs):
+        """Store the completion and pass percentages alongside their counters"""
+        self.subject_completion_percentage = percentage(self.completed_subjects, self.total_subjects)
+        self.lesson_completion_percentage = percentage(self.completed_lessons, self.total_lessons)
+        self.quiz_pass_percentage = percentage(self.passed_quizzes, self.total_quizzes)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                'subject_completion_percentage',
+                'lesson_completion_percentage',
+                'quiz_pass_percentage',
+            }
+        super().save(*args, **kwargs)
+    
     def calculate_grade_progress(self):
         """Calculate overall grade-level progress"""
         # Get all subjects for this grade level
@@ -244,8 +372,6 @@ class GradeProgress(models.Model):
             status='COMPLETED'
         )
         
-        self.completed_lessons = completed_lessons.count()
-        
         # Calculate passed quizzes
         passed_quizzes = QuizAttempt.objects.filter(
             student=self.student,
@@ -255,31 +381,30 @@ class GradeProgress(models.Model):
         
         self.passed_quizzes = passed_quizzes.count()
         
-        # Calculate total time spent
-        self.total_time_spent = completed_lessons.aggregate(
-            total_time=models.Sum('time_spent')
-        )['total_time'] or 0
-        
-        # Calculate overall average
-        scores = completed_lessons.exclude(score__isnull=True).values_list('score', flat=True)
-        if scores:
-            self.overall_average = sum(scores) / len(scores)
-        else:
-            self.overall_average = 0
+        # Calculate completed lessons, total time spent and overall average
+        totals = completed_lessons.aggregate(
+            completed=models.Count('id'),
+            total_time=models.Sum('time_spent'),
+            avg_score=models.Avg('score')
+        )
+        self.completed_lessons = totals['completed']
+        self.total_time_spent = totals['total_time'] or 0
+        self.overall_average = totals['avg_score'] or 0
         
         # Calculate completed subjects (subjects with 80%+ completion)
+        lessons_per_subject = lessons.values('chapter__subject').annotate(
+            total=models.Count('id')
+        ).order_by().values_list('chapter__subject', 'total')
+        completed_per_subject = dict(
+            completed_lessons.values('lesson__chapter__subject').annotate(
+                total=models.Count('id')
+            ).order_by().values_list('lesson__chapter__subject', 'total')
+        )
         completed_subjects = 0
-        for subject in subjects:
-            subject_lessons = lessons.filter(chapter__subject=subject)
-            if subject_lessons.exists():
-                completed_count = StudentProgress.objects.filter(
-                    student=self.student,
-                    lesson__in=subject_lessons,
-                    status='COMPLETED'
-                ).count()
-                completion_rate = (completed_count / subject_lessons.count()) * 100
-                if completion_rate >= 80:
-                    completed_subjects += 1
+        for subject_id, subject_lessons in lessons_per_subject:
+            completed_count = completed_per_subject.get(subject_id, 0)
+            if completed_count * 100 >= subject_lessons * 80:
+                completed_subjects += 1
         
         self.completed_subjects = completed_subjects
         
@@ -306,11 +431,13 @@ class ProgressMilestone(models.Model):
     
     class Meta:
         db_table = 'progress_milestones'
+        unique_together = ['student', 'milestone_type', 'title']
+        # Lookups by student alone use the composite indexes below
         indexes = [
-            models.Index(fields=['student']),
             models.Index(fields=['milestone_type']),
             models.Index(fields=['achieved_at']),
             models.Index(fields=['is_notified']),
+            models.Index(fields=['student', '-achieved_at']),
         ]
         ordering = ['-achieved_at']
     
@@ -331,7 +458,7 @@ class ProgressReport(models.Model):
     report_type = models.CharField(max_length=20, choices=REPORT_TYPES)
     period_start = models.DateField()
     period_end = models.DateField()
-    data = models.JSONField()  # Report data
+    data_z = models.BinaryField(null=True, blank=True, editable=False)  # Compressed report data
     generated_at = models.DateTimeField(auto_now_add=True)
     is_sent = models.BooleanField(default=False)
     
@@ -346,6 +473,8 @@ class ProgressReport(models.Model):
         ]
         ordering = ['-generated_at']
     
+    payload = compressed_json_property('data_z')
+    
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.report_type} Report"
 
@@ -355,7 +484,7 @@ class ParentDashboard(models.Model):
     parent = models.ForeignKey(User, on_delete=models.CASCADE, related_name='parent_dashboard')
     child = models.ForeignKey(User, on_delete=models.CASCADE, related_name='child_dashboard')
     last_updated = models.DateTimeField(auto_now=True)
-    data = models.JSONField(default=dict)  # Dashboard data
+    data_z = models.BinaryField(null=True, blank=True, editable=False)  # Compressed dashboard data
     
     class Meta:
         db_table = 'parent_dashboard'
@@ -366,6 +495,8 @@ class ParentDashboard(models.Model):
             models.Index(fields=['last_updated']),
         ]
     
+    payload = compressed_json_property('data_z')
+    
     def __str__(self):
         return f"{self.parent.get_full_name()} - {self.child.get_full_name()} Dashboard"
 
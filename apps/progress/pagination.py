@@ -0,0 +1,61 @@
+"""
+Pagination classes for progress tracking endpoints.
+"""
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that keeps the total row count in the cache between pages"""
+
+    def __init__(self, object_list, per_page, cache_key=None, refresh=False, timeout=300, **kwargs):
+        self.cache_key = cache_key
+        self.refresh = refresh
+        self.timeout = timeout
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return super().count
+
+        count = None if self.refresh else cache.get(self.cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.cache_key, count, self.timeout)
+        return count
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination that skips the COUNT(*) query on follow-up pages.
+
+    The count is cached per user, path and filter set. The first page always
+    recomputes it so a fresh listing never shows a stale total.
+    """
+    count_cache_timeout = 300
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_cache_key = self.get_count_cache_key(request)
+        self.refresh_count = request.query_params.get(self.page_query_param, '1') in ('', '1')
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, queryset, page_size):
+        return CachedCountPaginator(
+            queryset, page_size,
+            cache_key=self.count_cache_key,
+            refresh=self.refresh_count,
+            timeout=self.count_cache_timeout
+        )
+
+    def get_count_cache_key(self, request):
+        filters = sorted(
+            (key, value) for key, value in request.query_params.items()
+            if key != self.page_query_param
+        )
+        return f"count:{request.user.pk}:{request.path}:{urlencode(filters)}"
+
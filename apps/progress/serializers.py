@@ -2,7 +2,8 @@
 Serializers for progress tracking functionality.
 """
 from rest_framework import serializers
-from django.db.models import Avg, Count, Sum
+from django.db.models import Case, When, Value, F, Q, FloatField
+from django.db.models.functions import Cast, Least
 from .models import (
     StudentProgress, LearningStreak, SubjectProgress,
     GradeProgress, ProgressMilestone, ProgressReport,
@@ -12,12 +13,90 @@ from apps.content.serializers import LessonSerializer, SubjectSerializer
 from apps.accounts.serializers import UserProfileSerializer
 
 
+class ReadOnlyModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer for output-only use; skips the input/validation machinery"""
+    
+    @property
+    def _writable_fields(self):
+        return []
+
+
+class TimeSpentDisplayField(serializers.Field):
+    """Read-only field rendering a duration in seconds as "1h 5m" or "5m 30s"."""
+    
+    def __init__(self, unit='m', **kwargs):
+        self.unit = unit
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, value):
+        if self.unit == 'h':
+            hours, remainder = divmod(value, 3600)
+            minutes = remainder // 60
+            return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+        minutes, seconds = divmod(value, 60)
+        return f"{minutes}m {seconds}s" if minutes else f"{seconds}s"
+
+
+class CachedUserProfileSerializer(UserProfileSerializer):
+    """
+    UserProfileSerializer that renders each user once per response.
+    
+    Rows of a progress listing mostly belong to the same student, so the
+    nested profile (school, children) is built once and reused per user.
+    """
+    
+    def to_representation(self, instance):
+        root = self.root
+        rendered = getattr(root, '_rendered_profiles', None)
+        if rendered is None:
+            rendered = root._rendered_profiles = {}
+        if instance.pk not in rendered:
+            rendered[instance.pk] = super().to_representation(instance)
+        return rendered[instance.pk]
+
+
+def progress_percentage_expression():
+    """
+    SQL equivalent of StudentProgressSerializer.get_progress_percentage.
+
+    List views annotate it as ``annotated_progress_percentage`` so the
+    percentage for a whole page is computed by the database in one pass.
+    Both divide in the same order, so list and detail return the same float.
+    """
+    return Case(
+        When(status='COMPLETED', then=Value(100.0)),
+        When(status='NOT_STARTED', then=Value(0.0)),
+        When(
+            Q(lesson__content_type='VIDEO') & ~Q(lesson__duration=0),
+            then=Least(
+                Cast('last_position', FloatField()) / (F('lesson__duration') * 60) * 100,
+                Value(99.0)
+            )
+        ),
+        When(
+            lesson__content_type='SLIDES', lesson__duration=0,
+            then=Least(Cast('time_spent', FloatField()) / 300 * 100, Value(99.0))
+        ),
+        When(
+            lesson__content_type='SLIDES',
+            then=Least(
+                Cast('time_spent', FloatField()) / (F('lesson__duration') * 60) * 100,
+                Value(99.0)
+            )
+        ),
+        When(status='IN_PROGRESS', then=Value(50.0)),
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+
+
 class StudentProgressSerializer(serializers.ModelSerializer):
     """Serializer for StudentProgress model"""
     lesson = LessonSerializer(read_only=True)
-    student = UserProfileSerializer(read_only=True)
+    student = CachedUserProfileSerializer(read_only=True)
     progress_percentage = serializers.SerializerMethodField()
-    time_spent_display = serializers.SerializerMethodField()
+    time_spent_display = TimeSpentDisplayField(unit='m', source='time_spent')
     
     class Meta:
         model = StudentProgress
@@ -31,32 +110,28 @@ class StudentProgressSerializer(serializers.ModelSerializer):
     
     def get_progress_percentage(self, obj):
         """Calculate progress percentage based on lesson type and position"""
+        annotated = getattr(obj, 'annotated_progress_percentage', None)
+        if annotated is not None:
+            return annotated
+        
         if obj.status == 'COMPLETED':
-            return 100
+            return 100.0
         elif obj.status == 'NOT_STARTED':
-            return 0
+            return 0.0
         elif obj.lesson.content_type == 'VIDEO' and obj.lesson.duration:
             # For videos, calculate based on last position
-            return min((obj.last_position / (obj.lesson.duration * 60)) * 100, 99)
+            return min((obj.last_position / (obj.lesson.duration * 60)) * 100, 99.0)
         elif obj.lesson.content_type == 'SLIDES':
             # For slides, estimate based on time spent
             estimated_duration = obj.lesson.duration * 60 if obj.lesson.duration else 300  # 5 min default
-            return min((obj.time_spent / estimated_duration) * 100, 99)
+            return min((obj.time_spent / estimated_duration) * 100, 99.0)
         else:
-            return 50 if obj.status == 'IN_PROGRESS' else 0
-    
-    def get_time_spent_display(self, obj):
-        """Get formatted time spent"""
-        minutes = obj.time_spent // 60
-        seconds = obj.time_spent % 60
-        if minutes > 0:
-            return f"{minutes}m {seconds}s"
-        return f"{seconds}s"
+            return 50.0 if obj.status == 'IN_PROGRESS' else 0.0
 
 
-class LearningStreakSerializer(serializers.ModelSerializer):
+class LearningStreakSerializer(ReadOnlyModelSerializer):
     """Serializer for LearningStreak model"""
-    student = UserProfileSerializer(read_only=True)
+    student = CachedUserProfileSerializer(read_only=True)
     
     class Meta:
         model = LearningStreak
@@ -67,12 +142,12 @@ class LearningStreakSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class SubjectProgressSerializer(serializers.ModelSerializer):
+class SubjectProgressSerializer(ReadOnlyModelSerializer):
     """Serializer for SubjectProgress model"""
     subject = SubjectSerializer(read_only=True)
-    student = UserProfileSerializer(read_only=True)
-    completion_percentage = serializers.SerializerMethodField()
-    time_spent_display = serializers.SerializerMethodField()
+    student = CachedUserProfileSerializer(read_only=True)
+    completion_percentage = serializers.FloatField(read_only=True)
+    time_spent_display = TimeSpentDisplayField(unit='h', source='total_time_spent')
     
     class Meta:
         model = SubjectProgress
@@ -82,29 +157,15 @@ class SubjectProgressSerializer(serializers.ModelSerializer):
             'average_score', 'last_activity', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_completion_percentage(self, obj):
-        """Calculate completion percentage"""
-        if obj.total_lessons > 0:
-            return round((obj.completed_lessons / obj.total_lessons) * 100, 2)
-        return 0
-    
-    def get_time_spent_display(self, obj):
-        """Get formatted time spent"""
-        hours = obj.total_time_spent // 3600
-        minutes = (obj.total_time_spent % 3600) // 60
-        if hours > 0:
-            return f"{hours}h {minutes}m"
-        return f"{minutes}m"
 
 
-class GradeProgressSerializer(serializers.ModelSerializer):
+class GradeProgressSerializer(ReadOnlyModelSerializer):
     """Serializer for GradeProgress model"""
-    student = UserProfileSerializer(read_only=True)
-    lesson_completion_percentage = serializers.SerializerMethodField()
-    quiz_pass_percentage = serializers.SerializerMethodField()
-    subject_completion_percentage = serializers.SerializerMethodField()
-    time_spent_display = serializers.SerializerMethodField()
+    student = CachedUserProfileSerializer(read_only=True)
+    lesson_completion_percentage = serializers.FloatField(read_only=True)
+    quiz_pass_percentage = serializers.FloatField(read_only=True)
+    subject_completion_percentage = serializers.FloatField(read_only=True)
+    time_spent_display = TimeSpentDisplayField(unit='h', source='total_time_spent')
     
     class Meta:
         model = GradeProgress
@@ -116,37 +177,11 @@ class GradeProgressSerializer(serializers.ModelSerializer):
             'overall_average', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_lesson_completion_percentage(self, obj):
-        """Calculate lesson completion percentage"""
-        if obj.total_lessons > 0:
-            return round((obj.completed_lessons / obj.total_lessons) * 100, 2)
-        return 0
-    
-    def get_quiz_pass_percentage(self, obj):
-        """Calculate quiz pass percentage"""
-        if obj.total_quizzes > 0:
-            return round((obj.passed_quizzes / obj.total_quizzes) * 100, 2)
-        return 0
-    
-    def get_subject_completion_percentage(self, obj):
-        """Calculate subject completion percentage"""
-        if obj.total_subjects > 0:
-            return round((obj.completed_subjects / obj.total_subjects) * 100, 2)
-        return 0
-    
-    def get_time_spent_display(self, obj):
-        """Get formatted time spent"""
-        hours = obj.total_time_spent // 3600
-        minutes = (obj.total_time_spent % 3600) // 60
-        if hours > 0:
-            return f"{hours}h {minutes}m"
-        return f"{minutes}m"
 
 
-class ProgressMilestoneSerializer(serializers.ModelSerializer):
+class ProgressMilestoneSerializer(ReadOnlyModelSerializer):
     """Serializer for ProgressMilestone model"""
-    student = UserProfileSerializer(read_only=True)
+    student = CachedUserProfileSerializer(read_only=True)
     
     class Meta:
         model = ProgressMilestone
@@ -157,9 +192,39 @@ class ProgressMilestoneSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'achieved_at']
 
 
+MILESTONE_ROW_FIELDS = [
+    'id', 'milestone_type', 'title', 'description',
+    'achieved_at', 'metadata', 'is_notified'
+]
+
+
+def serialize_milestone_rows(rows, student):
+    """
+    Build ProgressMilestoneSerializer-shaped dicts from .values() rows.
+    
+    All rows must belong to the same student, whose already rendered
+    profile is passed in and shared by every row.
+    """
+    achieved_at = serializers.DateTimeField()
+    return [
+        {
+            'id': row['id'],
+            'student': student,
+            'milestone_type': row['milestone_type'],
+            'title': row['title'],
+            'description': row['description'],
+            'achieved_at': achieved_at.to_representation(row['achieved_at']),
+            'metadata': row['metadata'],
+            'is_notified': row['is_notified'],
+        }
+        for row in rows
+    ]
+
+
 class ProgressReportSerializer(serializers.ModelSerializer):
     """Serializer for ProgressReport model"""
-    student = UserProfileSerializer(read_only=True)
+    student = CachedUserProfileSerializer(read_only=True)
+    data = serializers.JSONField(source='payload', required=False)
     
     class Meta:
         model = ProgressReport
@@ -170,10 +235,11 @@ class ProgressReportSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'generated_at']
 
 
-class ParentDashboardSerializer(serializers.ModelSerializer):
+class ParentDashboardSerializer(ReadOnlyModelSerializer):
     """Serializer for ParentDashboard model"""
-    parent = UserProfileSerializer(read_only=True)
-    child = UserProfileSerializer(read_only=True)
+    parent = CachedUserProfileSerializer(read_only=True)
+    child = CachedUserProfileSerializer(read_only=True)
+    data = serializers.JSONField(source='payload', required=False)
     
     class Meta:
         model = ParentDashboard
@@ -193,9 +259,9 @@ class ProgressStatsSerializer(serializers.Serializer):
     current_streak = serializers.IntegerField()
     longest_streak = serializers.IntegerField()
     total_milestones = serializers.IntegerField()
-    recent_milestones = serializers.ListField(child=ProgressMilestoneSerializer())
-    subject_progress = serializers.ListField(child=SubjectProgressSerializer())
-    grade_progress = GradeProgressSerializer()
+    recent_milestones = ProgressMilestoneSerializer(many=True, read_only=True)
+    subject_progress = SubjectProgressSerializer(many=True, read_only=True)
+    grade_progress = GradeProgressSerializer(read_only=True, allow_null=True)
 
 
 class WeeklyProgressSerializer(serializers.Serializer):
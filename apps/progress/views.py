@@ -2,42 +2,77 @@
 Views for progress tracking functionality.
 """
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
-from django.db.models import Q, Avg, Count, Sum, F
+from rest_framework.renderers import BrowsableAPIRenderer
+from django.db.models import Q, Avg, Count, Sum, Prefetch, prefetch_related_objects
+from django.db.models.functions import Coalesce, TruncDate
+from django.core.cache import cache
 from django.utils import timezone
-from datetime import timedelta, date
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from datetime import datetime, time, timedelta
 from .models import (
     StudentProgress, LearningStreak, SubjectProgress,
-    GradeProgress, ProgressMilestone, ProgressReport,
-    ParentDashboard
+    GradeProgress, ProgressMilestone, ParentDashboard, percentage
 )
 from .serializers import (
     StudentProgressSerializer, LearningStreakSerializer,
     SubjectProgressSerializer, GradeProgressSerializer,
-    ProgressMilestoneSerializer, ProgressReportSerializer,
-    ParentDashboardSerializer, ProgressStatsSerializer,
-    WeeklyProgressSerializer, MonthlyProgressSerializer,
-    ProgressComparisonSerializer
+    ProgressMilestoneSerializer, ParentDashboardSerializer,
+    CachedUserProfileSerializer,
+    MILESTONE_ROW_FIELDS, progress_percentage_expression, serialize_milestone_rows
 )
+from .pagination import CachedCountPageNumberPagination
+from .etags import progress_etag, progress_cache_key
+from .coalesce import mark_student_dirty
+from apps.renderers import ORJSONRenderer
 from apps.accounts.models import User
-from apps.content.models import Lesson, Subject
-from apps.quizzes.models import QuizAttempt
+from apps.content.models import Lesson, LessonMedia
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns the nested UserProfileSerializer / LessonSerializer never read.
+# Deferring them keeps the joined rows on the list endpoints narrow.
+UNUSED_STUDENT_COLUMNS = [
+    'student__password', 'student__pin', 'student__parent_email',
+    'student__parent', 'student__is_superuser', 'student__is_staff',
+    'student__is_active', 'student__date_joined', 'student__updated_at',
+]
+UNUSED_LESSON_COLUMNS = ['lesson__average_rating', 'lesson__rating_count']
+# Columns LessonMediaSerializer renders, plus the key the prefetch joins on
+LESSON_MEDIA_COLUMNS = [
+    'id', 'lesson_id', 'media_type', 'file_url', 'file_name',
+    'file_size', 'mime_type', 'order_index', 'is_active'
+]
+
+RECENT_MILESTONES_LIMIT = 5
+
+# Cached stats/dashboard payloads are keyed on the student's progress
+# version, so this only bounds how long an unused entry lingers.
+PROGRESS_CACHE_TIMEOUT = 300
+
 
 class StudentProgressListView(generics.ListAPIView):
     """List student's progress across all lessons"""
     serializer_class = StudentProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CachedCountPageNumberPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         user = self.request.user
         queryset = StudentProgress.objects.filter(student=user).select_related(
-            'lesson__chapter__subject'
-        ).prefetch_related('lesson__media_files')
+            'lesson', 'student__school'
+        ).defer(
+            *UNUSED_STUDENT_COLUMNS, *UNUSED_LESSON_COLUMNS
+        ).annotate(
+            annotated_progress_percentage=progress_percentage_expression()
+        ).prefetch_related(
+            Prefetch('lesson__media_files', queryset=LessonMedia.objects.only(*LESSON_MEDIA_COLUMNS))
+        )
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -63,8 +98,14 @@ class StudentProgressDetailView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
+        # The lesson is rendered with its chapter id only, so no chapter or
+        # subject join; the nested student profile needs the school.
         return StudentProgress.objects.filter(student=self.request.user).select_related(
-            'lesson__chapter__subject'
+            'lesson', 'student__school'
+        ).defer(
+            *UNUSED_STUDENT_COLUMNS, *UNUSED_LESSON_COLUMNS
+        ).prefetch_related(
+            Prefetch('lesson__media_files', queryset=LessonMedia.objects.only(*LESSON_MEDIA_COLUMNS))
         )
 
 
@@ -73,7 +114,7 @@ class StudentProgressDetailView(generics.RetrieveUpdateAPIView):
 def update_lesson_progress(request, lesson_id):
     """Update progress for a specific lesson"""
     try:
-        lesson = Lesson.objects.get(id=lesson_id, is_active=True)
+        lesson = Lesson.objects.select_related('chapter').get(id=lesson_id, is_active=True)
     except Lesson.DoesNotExist:
         return Response({
             'error': 'Lesson not found'
@@ -98,44 +139,46 @@ def update_lesson_progress(request, lesson_id):
     last_position = request.data.get('last_position', 0)
     notes = request.data.get('notes', '')
     
+    # Collect every change and write the row once
+    changed_fields = set()
+    
     if action == 'start':
-        progress.mark_started()
+        changed_fields.update(progress.mark_started(commit=False))
     elif action == 'complete':
         score = request.data.get('score')
-        progress.mark_completed(score=score)
+        changed_fields.update(progress.mark_completed(score=score, commit=False))
     elif action == 'pause':
         progress.status = 'PAUSED'
-        progress.save(update_fields=['status', 'updated_at'])
+        changed_fields.add('status')
     elif action == 'resume':
         progress.status = 'IN_PROGRESS'
-        progress.save(update_fields=['status', 'updated_at'])
+        changed_fields.add('status')
     
     # Update time spent and position
     if time_spent > 0:
-        progress.update_time_spent(time_spent)
+        changed_fields.update(progress.update_time_spent(time_spent, commit=False))
     
     if last_position > 0:
         progress.last_position = last_position
-        progress.save(update_fields=['last_position', 'updated_at'])
+        changed_fields.add('last_position')
     
     if notes:
         progress.notes = notes
-        progress.save(update_fields=['notes', 'updated_at'])
-    
-    # Update learning streak
-    update_learning_streak(user)
+        changed_fields.add('notes')
     
-    # Check for milestones
-    check_milestones(user, progress)
+    if changed_fields:
+        progress.save(update_fields=[*changed_fields, 'updated_at'])
     
-    # Update subject and grade progress
-    update_subject_progress(user, lesson.chapter.subject)
-    update_grade_progress(user)
+    # Update streak, milestones and subject/grade progress in the background.
+    # A completion also marks the student from post_save; both marks land in
+    # the same per-request task.
+    mark_student_dirty(user.id, [lesson.chapter.subject_id])
     
     serializer = StudentProgressSerializer(progress)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@method_decorator([cache_control(private=True, no_cache=True), condition(etag_func=progress_etag)], name='get')
 class LearningStreakView(generics.RetrieveAPIView):
     """Get user's learning streak information"""
     serializer_class = LearningStreakSerializer
@@ -152,10 +195,14 @@ class SubjectProgressListView(generics.ListAPIView):
     """List progress by subject"""
     serializer_class = SubjectProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CachedCountPageNumberPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         user = self.request.user
-        queryset = SubjectProgress.objects.filter(student=user).select_related('subject')
+        queryset = SubjectProgress.objects.filter(student=user).select_related(
+            'subject', 'student__school'
+        ).defer(*UNUSED_STUDENT_COLUMNS)
         
         # Filter by grade level
         grade_level = self.request.query_params.get('grade_level')
@@ -190,6 +237,8 @@ class ProgressMilestoneListView(generics.ListAPIView):
     """List user's progress milestones"""
     serializer_class = ProgressMilestoneSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CachedCountPageNumberPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         user = self.request.user
@@ -206,10 +255,26 @@ class ProgressMilestoneListView(generics.ListAPIView):
             queryset = queryset.filter(is_notified=is_notified.lower() == 'true')
         
         return queryset.order_by('-achieved_at')
+    
+    def list(self, request, *args, **kwargs):
+        # Every milestone here belongs to the requesting user, so read plain
+        # rows and render the student profile once instead of per instance.
+        queryset = self.get_queryset().values(*MILESTONE_ROW_FIELDS)
+        page = self.paginate_queryset(queryset)
+        student = CachedUserProfileSerializer(
+            request.user, context=self.get_serializer_context()
+        ).data
+        
+        if page is not None:
+            return self.get_paginated_response(serialize_milestone_rows(page, student))
+        return Response(serialize_milestone_rows(queryset, student))
 
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=progress_etag)
 def progress_stats(request):
     """Get comprehensive progress statistics"""
     user = request.user
@@ -219,31 +284,45 @@ def progress_stats(request):
             'error': 'Only students can view progress statistics'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Get basic progress data
-    progress_records = StudentProgress.objects.filter(student=user)
-    
-    total_lessons = progress_records.count()
-    completed_lessons = progress_records.filter(status='COMPLETED').count()
-    in_progress_lessons = progress_records.filter(status='IN_PROGRESS').count()
-    
-    total_time_spent = progress_records.aggregate(
-        total_time=Sum('time_spent')
-    )['total_time'] or 0
-    
-    average_score = progress_records.filter(
-        score__isnull=False
-    ).aggregate(avg_score=Avg('score'))['avg_score'] or 0
+    cache_key = progress_cache_key('progress_stats', user.pk)
+    stats = cache.get(cache_key)
+    if stats is not None:
+        return Response(stats, status=status.HTTP_200_OK)
+    
+    # Get basic progress data in a single aggregate query
+    totals = StudentProgress.objects.filter(student=user).aggregate(
+        total_lessons=Count('id'),
+        completed_lessons=Count('id', filter=Q(status='COMPLETED')),
+        in_progress_lessons=Count('id', filter=Q(status='IN_PROGRESS')),
+        total_time=Coalesce(Sum('time_spent'), 0),
+        avg_score=Coalesce(Avg('score'), 0.0)
+    )
+    total_time_spent = totals['total_time']
+    average_score = totals['avg_score']
     
     # Get learning streak
     streak, created = LearningStreak.objects.get_or_create(student=user)
     
-    # Get recent milestones
-    recent_milestones = ProgressMilestone.objects.filter(
-        student=user
-    ).order_by('-achieved_at')[:5]
+    # Prefetch recent milestones and subject progress onto the user; the
+    # prefetch also points each row's student back at this user object.
+    prefetch_related_objects(
+        [user],
+        Prefetch(
+            'milestones',
+            queryset=ProgressMilestone.objects.order_by('-achieved_at')[:RECENT_MILESTONES_LIMIT],
+            to_attr='recent_milestones'
+        ),
+        Prefetch(
+            'subject_progress',
+            queryset=SubjectProgress.objects.select_related('subject'),
+            to_attr='subject_progress_list'
+        )
+    )
     
-    # Get subject progress
-    subject_progress = SubjectProgress.objects.filter(student=user).select_related('subject')
+    # Fewer recent milestones than the limit means that is all of them
+    total_milestones = len(user.recent_milestones)
+    if total_milestones == RECENT_MILESTONES_LIMIT:
+        total_milestones = ProgressMilestone.objects.filter(student=user).count()
     
     # Get grade progress
     grade_progress = None
@@ -256,89 +335,28 @@ def progress_stats(request):
             grade_progress.calculate_grade_progress()
     
     stats = {
-        'total_lessons': total_lessons,
-        'completed_lessons': completed_lessons,
-        'in_progress_lessons': in_progress_lessons,
+        'total_lessons': totals['total_lessons'],
+        'completed_lessons': totals['completed_lessons'],
+        'in_progress_lessons': totals['in_progress_lessons'],
         'total_time_spent': total_time_spent,
         'average_score': round(average_score, 2),
         'current_streak': streak.current_streak,
         'longest_streak': streak.longest_streak,
-        'total_milestones': ProgressMilestone.objects.filter(student=user).count(),
-        'recent_milestones': ProgressMilestoneSerializer(recent_milestones, many=True).data,
-        'subject_progress': SubjectProgressSerializer(subject_progress, many=True).data,
+        'total_milestones': total_milestones,
+        'recent_milestones': ProgressMilestoneSerializer(user.recent_milestones, many=True).data,
+        'subject_progress': SubjectProgressSerializer(user.subject_progress_list, many=True).data,
         'grade_progress': GradeProgressSerializer(grade_progress).data if grade_progress else None
     }
+    cache.set(cache_key, stats, PROGRESS_CACHE_TIMEOUT)
     
     return Response(stats, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def weekly_progress(request):
-    """Get weekly progress data"""
-    user = request.user
-    
-    if not user.is_student():
-        return Response({
-            'error': 'Only students can view progress data'
-        }, status=status.HTTP_403_FORBIDDEN)
-    
-    # Get current week
-    today = date.today()
-    week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
-    
-    # Get progress for this week
-    week_progress = StudentProgress.objects.filter(
-        student=user,
-        completed_at__date__range=[week_start, week_end]
-    )
-    
-    lessons_completed = week_progress.filter(status='COMPLETED').count()
-    time_spent = week_progress.aggregate(total_time=Sum('time_spent'))['total_time'] or 0
-    
-    # Get quiz attempts for this week
-    week_quizzes = QuizAttempt.objects.filter(
-        student=user,
-        started_at__date__range=[week_start, week_end]
-    )
-    
-    quizzes_taken = week_quizzes.count()
-    quizzes_passed = week_quizzes.filter(is_passed=True).count()
-    
-    average_score = week_quizzes.filter(
-        score__isnull=False
-    ).aggregate(avg_score=Avg('score'))['avg_score'] or 0
-    
-    # Get daily activity
-    daily_activity = {}
-    for i in range(7):
-        day = week_start + timedelta(days=i)
-        day_progress = StudentProgress.objects.filter(
-            student=user,
-            completed_at__date=day
-        )
-        daily_activity[day.strftime('%Y-%m-%d')] = {
-            'lessons_completed': day_progress.filter(status='COMPLETED').count(),
-            'time_spent': day_progress.aggregate(total_time=Sum('time_spent'))['total_time'] or 0
-        }
-    
-    weekly_data = {
-        'week_start': week_start,
-        'week_end': week_end,
-        'lessons_completed': lessons_completed,
-        'time_spent': time_spent,
-        'quizzes_taken': quizzes_taken,
-        'quizzes_passed': quizzes_passed,
-        'average_score': round(average_score, 2),
-        'daily_activity': daily_activity
-    }
-    
-    return Response(weekly_data, status=status.HTTP_200_OK)
-
-
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=progress_etag)
 def parent_dashboard(request, child_id):
     """Get parent dashboard data for a specific child"""
     user = request.user
@@ -355,6 +373,12 @@ def parent_dashboard(request, child_id):
             'error': 'Child not found or access denied'
         }, status=status.HTTP_404_NOT_FOUND)
     
+    # Serve the last build until the child's progress changes
+    cache_key = progress_cache_key('dashboard', child.pk, user.pk)
+    data = cache.get(cache_key)
+    if data is not None:
+        return Response(data, status=status.HTTP_200_OK)
+    
     # Get or create dashboard data
     dashboard, created = ParentDashboard.objects.get_or_create(
         parent=user,
@@ -365,121 +389,26 @@ def parent_dashboard(request, child_id):
     update_parent_dashboard_data(dashboard)
     
     serializer = ParentDashboardSerializer(dashboard)
+    cache.set(cache_key, serializer.data, PROGRESS_CACHE_TIMEOUT)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-def update_learning_streak(user):
-    """Update user's learning streak"""
-    if not user.is_student():
-        return
-    
-    streak, created = LearningStreak.objects.get_or_create(student=user)
-    streak.update_streak()
-
-
-def check_milestones(user, progress):
-    """Check and create milestones for user progress"""
-    if not user.is_student():
-        return
-    
-    # Lesson completion milestone
-    if progress.status == 'COMPLETED':
-        completed_count = StudentProgress.objects.filter(
-            student=user,
-            status='COMPLETED'
-        ).count()
-        
-        if completed_count == 1:
-            create_milestone(
-                user, 'LESSON_COMPLETION',
-                'First Lesson Completed!',
-                'Congratulations on completing your first lesson!'
-            )
-        elif completed_count == 10:
-            create_milestone(
-                user, 'LESSON_COMPLETION',
-                '10 Lessons Completed!',
-                'Amazing! You\'ve completed 10 lessons. Keep up the great work!'
-            )
-        elif completed_count == 50:
-            create_milestone(
-                user, 'LESSON_COMPLETION',
-                '50 Lessons Completed!',
-                'Outstanding! You\'ve completed 50 lessons. You\'re a learning champion!'
-            )
-    
-    # Streak milestones
-    streak, created = LearningStreak.objects.get_or_create(student=user)
-    if streak.current_streak == 7:
-        create_milestone(
-            user, 'STREAK_ACHIEVEMENT',
-            '7-Day Learning Streak!',
-            'Fantastic! You\'ve maintained a 7-day learning streak!'
-        )
-    elif streak.current_streak == 30:
-        create_milestone(
-            user, 'STREAK_ACHIEVEMENT',
-            '30-Day Learning Streak!',
-            'Incredible! You\'ve maintained a 30-day learning streak!'
-        )
-
-
-def create_milestone(user, milestone_type, title, description, metadata=None):
-    """Create a new milestone for the user"""
-    milestone, created = ProgressMilestone.objects.get_or_create(
-        student=user,
-        milestone_type=milestone_type,
-        title=title,
-        defaults={
-            'description': description,
-            'metadata': metadata or {}
-        }
-    )
-    
-    if created:
-        logger.info(f"Milestone created: {user.username} - {title}")
-
-
-def update_subject_progress(user, subject):
-    """Update subject progress for a user"""
-    if not user.is_student():
-        return
-    
-    progress, created = SubjectProgress.objects.get_or_create(
-        student=user,
-        subject=subject
-    )
-    progress.calculate_progress()
-
-
-def update_grade_progress(user):
-    """Update grade-level progress for a user"""
-    if not user.is_student() or not user.grade_level:
-        return
-    
-    progress, created = GradeProgress.objects.get_or_create(
-        student=user,
-        grade_level=user.grade_level
-    )
-    progress.calculate_grade_progress()
-
-
 def update_parent_dashboard_data(dashboard):
     """Update parent dashboard data"""
     child = dashboard.child
     
-    # Get child's progress data
+    # Get child's progress data in a single aggregate query
+    totals = StudentProgress.objects.filter(student=child).aggregate(
+        total_lessons=Count('id'),
+        completed_lessons=Count('id', filter=Q(status='COMPLETED')),
+        total_time=Coalesce(Sum('time_spent'), 0),
+        avg_score=Coalesce(Avg('score'), 0.0)
+    )
     progress_data = {
-        'total_lessons': StudentProgress.objects.filter(student=child).count(),
-        'completed_lessons': StudentProgress.objects.filter(
-            student=child, status='COMPLETED'
-        ).count(),
-        'total_time_spent': StudentProgress.objects.filter(
-            student=child
-        ).aggregate(total_time=Sum('time_spent'))['total_time'] or 0,
-        'average_score': StudentProgress.objects.filter(
-            student=child, score__isnull=False
-        ).aggregate(avg_score=Avg('score'))['avg_score'] or 0,
+        'total_lessons': totals['total_lessons'],
+        'completed_lessons': totals['completed_lessons'],
+        'total_time_spent': totals['total_time'],
+        'average_score': totals['avg_score'],
         'current_streak': 0,
         'recent_activity': [],
         'subject_progress': {},
@@ -496,48 +425,128 @@ def update_parent_dashboard_data(dashboard):
     # Get recent activity
     recent_progress = StudentProgress.objects.filter(
         student=child
-    ).order_by('-updated_at')[:10]
+    ).order_by('-updated_at').values(
+        'lesson__title', 'status', 'updated_at', 'lesson__chapter__subject__name'
+    )[:10]
     
     for progress in recent_progress:
         progress_data['recent_activity'].append({
-            'lesson_title': progress.lesson.title,
-            'status': progress.status,
-            'updated_at': progress.updated_at,
-            'subject': progress.lesson.chapter.subject.name
+            'lesson_title': progress['lesson__title'],
+            'status': progress['status'],
+            'updated_at': progress['updated_at'],
+            'subject': progress['lesson__chapter__subject__name']
         })
     
     # Get subject progress
-    subject_progress = SubjectProgress.objects.filter(student=child)
+    subject_progress = SubjectProgress.objects.filter(student=child).select_related('subject')
     for progress in subject_progress:
         progress_data['subject_progress'][progress.subject.name] = {
             'completed_lessons': progress.completed_lessons,
             'total_lessons': progress.total_lessons,
-            'completion_percentage': round(
-                (progress.completed_lessons / progress.total_lessons * 100) 
-                if progress.total_lessons > 0 else 0, 2
-            ),
+            'completion_percentage': progress.completion_percentage,
             'average_score': progress.average_score
         }
     
     # Get recent milestones
     recent_milestones = ProgressMilestone.objects.filter(
         student=child
-    ).order_by('-achieved_at')[:5]
+    ).order_by('-achieved_at').values(
+        'title', 'description', 'achieved_at', 'milestone_type'
+    )[:5]
     
     for milestone in recent_milestones:
         progress_data['milestones'].append({
-            'title': milestone.title,
-            'description': milestone.description,
-            'achieved_at': milestone.achieved_at,
-            'type': milestone.milestone_type
+            'title': milestone['title'],
+            'description': milestone['description'],
+            'achieved_at': milestone['achieved_at'],
+            'type': milestone['milestone_type']
         })
     
-    dashboard.data = progress_data
+    dashboard.payload = progress_data
     dashboard.save()
 
 
+def updated_between(start, end):
+    """
+    Filter kwargs for rows updated on any day from start to end inclusive.
+    
+    Compares updated_at against datetime bounds rather than using
+    updated_at__date, so the (student, updated_at) index can serve the range.
+    """
+    tz = timezone.get_current_timezone()
+    return {
+        'updated_at__gte': datetime.combine(start, time.min, tzinfo=tz),
+        'updated_at__lt': datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz),
+    }
+
+
+def daily_progress_totals(queryset, date_field):
+    """
+    Group progress rows by the date of date_field in a single query.
+    
+    Returns a dict keyed by date with total_lessons, lessons_completed,
+    total_time, score_total and score_count (rows with a score) for that day.
+    """
+    rows = queryset.annotate(
+        day=TruncDate(date_field)
+    ).values('day').annotate(
+        total_lessons=Count('id'),
+        lessons_completed=Count('id', filter=Q(status='COMPLETED')),
+        total_time=Coalesce(Sum('time_spent'), 0),
+        score_total=Coalesce(Sum('score'), 0.0),
+        score_count=Count('score')
+    ).order_by()
+    return {row['day']: row for row in rows}
+
+
+def summarize_period(daily_totals):
+    """Return (total_lessons, completed_lessons, total_time, average_score) over all days"""
+    summary = summarize_daily_totals(daily_totals.values())
+    total_lessons = sum(totals['total_lessons'] for totals in daily_totals.values())
+    return (
+        total_lessons, summary['lessons_completed'],
+        summary['time_spent'], summary['average_score']
+    )
+
+
+def subject_progress_totals(queryset):
+    """Per-subject lessons_completed, time_spent and average_score in one GROUP BY query"""
+    rows = queryset.values('lesson__chapter__subject__name').annotate(
+        lessons_completed=Count('id', filter=Q(status='COMPLETED')),
+        total_time=Coalesce(Sum('time_spent'), 0),
+        avg_score=Coalesce(Avg('score'), 0.0)
+    ).order_by()
+    return {
+        row['lesson__chapter__subject__name']: {
+            'lessons_completed': row['lessons_completed'],
+            'time_spent': row['total_time'],
+            'average_score': row['avg_score']
+        }
+        for row in rows
+    }
+
+
+def summarize_daily_totals(days):
+    """Combine daily_progress_totals() rows (None for idle days) into one breakdown entry"""
+    lessons_completed = time_spent = score_total = score_count = 0
+    for totals in days:
+        if totals:
+            lessons_completed += totals['lessons_completed']
+            time_spent += totals['total_time']
+            score_total += totals['score_total']
+            score_count += totals['score_count']
+    return {
+        'lessons_completed': lessons_completed,
+        'time_spent': time_spent,
+        'average_score': score_total / score_count if score_count else 0
+    }
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=progress_etag)
 def weekly_progress(request):
     """Get weekly progress data for the authenticated user"""
     user = request.user
@@ -555,54 +564,24 @@ def weekly_progress(request):
     # Get progress data for the week
     week_progress = StudentProgress.objects.filter(
         student=user,
-        updated_at__date__range=[week_start, week_end]
-    ).select_related('lesson__chapter__subject')
+        **updated_between(week_start, week_end)
+    )
     
-    # Calculate weekly statistics
-    total_lessons = week_progress.count()
-    completed_lessons = week_progress.filter(status='COMPLETED').count()
-    total_time = week_progress.aggregate(total=Sum('time_spent'))['total'] or 0
-    average_score = week_progress.filter(score__isnull=False).aggregate(
-        avg=Avg('score')
-    )['avg'] or 0
+    # Calculate weekly statistics from the per-day totals
+    daily_totals = daily_progress_totals(week_progress, 'updated_at')
+    total_lessons, completed_lessons, total_time, average_score = summarize_period(daily_totals)
     
     # Get daily breakdown
     daily_data = []
     for i in range(7):
         day = week_start + timedelta(days=i)
-        day_progress = week_progress.filter(updated_at__date=day)
-        
         daily_data.append({
             'date': day,
-            'lessons_completed': day_progress.filter(status='COMPLETED').count(),
-            'time_spent': day_progress.aggregate(total=Sum('time_spent'))['total'] or 0,
-            'average_score': day_progress.filter(score__isnull=False).aggregate(
-                avg=Avg('score')
-            )['avg'] or 0
+            **summarize_daily_totals([daily_totals.get(day)])
         })
     
     # Get subject breakdown
-    subject_data = {}
-    for progress in week_progress:
-        subject_name = progress.lesson.chapter.subject.name
-        if subject_name not in subject_data:
-            subject_data[subject_name] = {
-                'lessons_completed': 0,
-                'time_spent': 0,
-                'average_score': 0
-            }
-        
-        if progress.status == 'COMPLETED':
-            subject_data[subject_name]['lessons_completed'] += 1
-        
-        subject_data[subject_name]['time_spent'] += progress.time_spent
-        
-        if progress.score:
-            current_avg = subject_data[subject_name]['average_score']
-            if current_avg == 0:
-                subject_data[subject_name]['average_score'] = progress.score
-            else:
-                subject_data[subject_name]['average_score'] = (current_avg + progress.score) / 2
+    subject_data = subject_progress_totals(week_progress)
     
     return Response({
         'week_start': week_start,
@@ -610,7 +589,7 @@ def weekly_progress(request):
         'summary': {
             'total_lessons': total_lessons,
             'completed_lessons': completed_lessons,
-            'completion_rate': round((completed_lessons / total_lessons * 100) if total_lessons > 0 else 0, 2),
+            'completion_rate': percentage(completed_lessons, total_lessons),
             'total_time_spent': total_time,
             'average_score': round(average_score, 2)
         },
@@ -621,6 +600,9 @@ def weekly_progress(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=progress_etag)
 def monthly_progress(request):
     """Get monthly progress data for the authenticated user"""
     user = request.user
@@ -641,16 +623,12 @@ def monthly_progress(request):
     # Get progress data for the month
     month_progress = StudentProgress.objects.filter(
         student=user,
-        updated_at__date__range=[month_start, month_end]
-    ).select_related('lesson__chapter__subject')
+        **updated_between(month_start, month_end)
+    )
     
-    # Calculate monthly statistics
-    total_lessons = month_progress.count()
-    completed_lessons = month_progress.filter(status='COMPLETED').count()
-    total_time = month_progress.aggregate(total=Sum('time_spent'))['total'] or 0
-    average_score = month_progress.filter(score__isnull=False).aggregate(
-        avg=Avg('score')
-    )['avg'] or 0
+    # Calculate monthly statistics from the per-day totals
+    daily_totals = daily_progress_totals(month_progress, 'updated_at')
+    total_lessons, completed_lessons, total_time, average_score = summarize_period(daily_totals)
     
     # Get weekly breakdown
     weekly_data = []
@@ -659,59 +637,37 @@ def monthly_progress(request):
     
     while current_week_start <= month_end:
         week_end = min(current_week_start + timedelta(days=6), month_end)
-        week_progress = month_progress.filter(
-            updated_at__date__range=[current_week_start, week_end]
-        )
+        week_days = (week_end - current_week_start).days + 1
         
         weekly_data.append({
             'week': week_num,
             'week_start': current_week_start,
             'week_end': week_end,
-            'lessons_completed': week_progress.filter(status='COMPLETED').count(),
-            'time_spent': week_progress.aggregate(total=Sum('time_spent'))['total'] or 0,
-            'average_score': week_progress.filter(score__isnull=False).aggregate(
-                avg=Avg('score')
-            )['avg'] or 0
+            **summarize_daily_totals(
+                daily_totals.get(current_week_start + timedelta(days=i))
+                for i in range(week_days)
+            )
         })
         
         current_week_start += timedelta(days=7)
         week_num += 1
     
     # Get subject breakdown
-    subject_data = {}
-    for progress in month_progress:
-        subject_name = progress.lesson.chapter.subject.name
-        if subject_name not in subject_data:
-            subject_data[subject_name] = {
-                'lessons_completed': 0,
-                'time_spent': 0,
-                'average_score': 0,
-                'completion_rate': 0
-            }
-        
-        if progress.status == 'COMPLETED':
-            subject_data[subject_name]['lessons_completed'] += 1
-        
-        subject_data[subject_name]['time_spent'] += progress.time_spent
-        
-        if progress.score:
-            current_avg = subject_data[subject_name]['average_score']
-            if current_avg == 0:
-                subject_data[subject_name]['average_score'] = progress.score
-            else:
-                subject_data[subject_name]['average_score'] = (current_avg + progress.score) / 2
+    subject_data = subject_progress_totals(month_progress)
     
     # Calculate completion rates for subjects
-    for subject_name in subject_data:
-        subject_lessons = Lesson.objects.filter(
-            chapter__subject__name=subject_name,
+    subject_lessons = dict(
+        Lesson.objects.filter(
+            chapter__subject__name__in=subject_data,
             is_active=True
-        ).count()
-        
-        if subject_lessons > 0:
-            subject_data[subject_name]['completion_rate'] = round(
-                (subject_data[subject_name]['lessons_completed'] / subject_lessons * 100), 2
-            )
+        ).values('chapter__subject__name').annotate(
+            total=Count('id')
+        ).order_by().values_list('chapter__subject__name', 'total')
+    )
+    for subject_name, data in subject_data.items():
+        data['completion_rate'] = percentage(
+            data['lessons_completed'], subject_lessons.get(subject_name, 0)
+        )
     
     return Response({
         'month_start': month_start,
@@ -719,7 +675,7 @@ def monthly_progress(request):
         'summary': {
             'total_lessons': total_lessons,
             'completed_lessons': completed_lessons,
-            'completion_rate': round((completed_lessons / total_lessons * 100) if total_lessons > 0 else 0, 2),
+            'completion_rate': percentage(completed_lessons, total_lessons),
             'total_time_spent': total_time,
             'average_score': round(average_score, 2)
         },
@@ -2,6 +2,7 @@
 Admin configuration for quizzes app.
 """
 from django.contrib import admin
+from django.db.models.functions import Substr
 from django.utils.html import format_html
 from .models import (
     Quiz, Question, QuizAttempt, Answer, QuizResult,
@@ -19,9 +20,8 @@ class QuizAdmin(admin.ModelAdmin):
     list_filter = ['grade_level', 'is_active', 'is_premium', 'created_at']
     search_fields = ['title', 'description', 'subject__name']
     ordering = ['-created_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('subject', 'lesson', 'created_by')
+    list_select_related = ['subject', 'created_by']
+    readonly_fields = ['active_question_count', 'total_points']
 
 
 @admin.register(Question)
@@ -34,13 +34,18 @@ class QuestionAdmin(admin.ModelAdmin):
     list_filter = ['question_type', 'difficulty_level', 'is_active', 'quiz__grade_level']
     search_fields = ['question_text', 'quiz__title']
     ordering = ['quiz', 'order_index']
+    list_select_related = ['quiz__subject']
+    
+    def get_queryset(self, request):
+        # Only the first 51 characters are needed to render the truncated column
+        return super().get_queryset(request).annotate(
+            question_text_preview=Substr('question_text', 1, 51)
+        ).defer('question_text')
     
     def question_text_short(self, obj):
-        return obj.question_text[:50] + '...' if len(obj.question_text) > 50 else obj.question_text
+        text = obj.question_text_preview
+        return text[:50] + '...' if len(text) > 50 else text
     question_text_short.short_description = 'Question Text'
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('quiz')
 
 
 @admin.register(QuizAttempt)
@@ -54,13 +59,11 @@ class QuizAttemptAdmin(admin.ModelAdmin):
     search_fields = ['student__username', 'student__email', 'quiz__title']
     readonly_fields = ['started_at', 'time_spent_display']
     ordering = ['-started_at']
+    list_select_related = ['student', 'quiz__subject']
     
     def time_spent_display(self, obj):
         return obj.get_time_spent_display()
     time_spent_display.short_description = 'Time Spent'
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('student', 'quiz')
 
 
 @admin.register(Answer)
@@ -74,17 +77,24 @@ class AnswerAdmin(admin.ModelAdmin):
     search_fields = ['attempt__student__username', 'question__question_text']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+    list_select_related = ['attempt__student', 'attempt__quiz', 'question']
+    
+    def get_queryset(self, request):
+        # Only the first 31 characters are needed to render the truncated columns
+        return super().get_queryset(request).annotate(
+            question_preview=Substr('question__question_text', 1, 31),
+            answer_text_preview=Substr('answer_text', 1, 31)
+        ).defer('answer_text', 'question__question_text')
     
     def question_short(self, obj):
-        return obj.question.question_text[:30] + '...' if len(obj.question.question_text) > 30 else obj.question.question_text
+        text = obj.question_preview
+        return text[:30] + '...' if len(text) > 30 else text
     question_short.short_description = 'Question'
     
     def answer_text_short(self, obj):
-        return obj.answer_text[:30] + '...' if obj.answer_text and len(obj.answer_text) > 30 else obj.answer_text
+        text = obj.answer_text_preview
+        return text[:30] + '...' if text and len(text) > 30 else text
     answer_text_short.short_description = 'Answer'
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('attempt__student', 'question')
 
 
 @admin.register(QuizResult)
@@ -95,9 +105,7 @@ class QuizResultAdmin(admin.ModelAdmin):
     search_fields = ['attempt__student__username', 'attempt__quiz__title']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('attempt__student', 'attempt__quiz')
+    list_select_related = ['attempt__student', 'attempt__quiz']
 
 
 @admin.register(QuizSession)
@@ -111,9 +119,7 @@ class QuizSessionAdmin(admin.ModelAdmin):
     search_fields = ['student__username', 'quiz__title', 'session_key']
     readonly_fields = ['session_key', 'started_at', 'last_activity']
     ordering = ['-started_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('student', 'quiz')
+    list_select_related = ['student', 'quiz__subject']
 
 
 @admin.register(QuizFeedback)
@@ -124,9 +130,7 @@ class QuizFeedbackAdmin(admin.ModelAdmin):
     search_fields = ['attempt__student__username', 'attempt__quiz__title']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('attempt__student', 'attempt__quiz')
+    list_select_related = ['attempt__student', 'attempt__quiz']
 
 
 @admin.register(QuizAnalytics)
@@ -140,8 +144,6 @@ class QuizAnalyticsAdmin(admin.ModelAdmin):
     search_fields = ['quiz__title']
     readonly_fields = ['last_updated']
     ordering = ['-last_updated']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('quiz')
+    list_select_related = ['quiz__subject']
 
 
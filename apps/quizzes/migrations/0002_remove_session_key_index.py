@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 12:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='quizsession',
+            name='quiz_sessio_session_58ee3a_idx',
+        ),
+    ]
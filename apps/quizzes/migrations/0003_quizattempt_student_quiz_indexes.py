@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-16 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0002_remove_session_key_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['student', 'quiz', 'completed_at'], name='quiz_attemp_student_b59383_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['student', 'quiz', '-score'], name='qa_best_score_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='quizattempt',
+            name='quiz_attemp_student_bf871b_idx',
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-16 12:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_question_totals(apps, schema_editor):
+    Quiz = apps.get_model('quizzes', 'Quiz')
+    Question = apps.get_model('quizzes', 'Question')
+
+    active_questions = Question.objects.filter(
+        quiz=OuterRef('pk'), is_active=True
+    ).order_by().values('quiz')
+    Quiz.objects.update(
+        active_question_count=Coalesce(Subquery(
+            active_questions.annotate(total=Count('pk')).values('total')
+        ), 0),
+        total_points=Coalesce(Subquery(
+            active_questions.annotate(total=Sum('points')).values('total')
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_quizattempt_student_quiz_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='active_question_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='total_points',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_question_totals, migrations.RunPython.noop),
+    ]
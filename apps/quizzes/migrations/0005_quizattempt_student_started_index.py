@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0004_quiz_question_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['student', '-started_at'], name='quiz_attemp_student_59e564_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-16 18:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_session_attempts(apps, schema_editor):
+    QuizSession = apps.get_model('quizzes', 'QuizSession')
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+
+    # Session keys are "<student>_<quiz>_<attempt>"
+    sessions = []
+    for session in QuizSession.objects.filter(attempt__isnull=True).iterator(chunk_size=1000):
+        attempt_id = session.session_key.rsplit('_', 1)[-1]
+        if attempt_id.isdigit():
+            session.attempt_id = int(attempt_id)
+            sessions.append(session)
+
+    existing = set(QuizAttempt.objects.filter(
+        id__in=[session.attempt_id for session in sessions]
+    ).values_list('id', flat=True))
+    QuizSession.objects.bulk_update(
+        [session for session in sessions if session.attempt_id in existing],
+        ['attempt'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_quizattempt_student_started_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsession',
+            name='attempt',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='session', to='quizzes.quizattempt'),
+        ),
+        migrations.RunPython(backfill_session_attempts, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,79 @@
 """
 Quiz and assessment models for Learning Cloud.
 """
+from datetime import timedelta
+
 from django.db import models
+from django.db.models import Avg, Count, Exists, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.core.cache import cache
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from apps.accounts.models import User
 from apps.content.models import Lesson, Subject
 
 
+ACTIVE_QUIZ_COUNT_KEY = 'quizzes:active:count'
+QUESTION_IDS_CACHE_KEY = 'quiz:{}:question_ids'
+QUESTION_IDS_CACHE_TIMEOUT = 3600
+QUIZ_ANALYTICS_CACHE_KEY = 'quiz:{}:analytics'
+
+
+def get_active_question_ids(quiz_id):
+    """Ordered ids of a quiz's active questions, cached until one of them changes"""
+    return cache.get_or_set(
+        QUESTION_IDS_CACHE_KEY.format(quiz_id),
+        lambda: list(Question.objects.filter(
+            quiz_id=quiz_id, is_active=True
+        ).order_by('order_index').values_list('id', flat=True)),
+        QUESTION_IDS_CACHE_TIMEOUT
+    )
+
+
+class QuizQuerySet(models.QuerySet):
+    """QuerySet helpers for quiz listings"""
+    
+    def with_stats(self, user=None):
+        """
+        Annotate the per-quiz attempt numbers QuizSerializer renders.
+        
+        Aggregates are correlated subqueries so the attempt join doesn't
+        multiply rows of anything else selected alongside.
+        """
+        attempts = QuizAttempt.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz')
+        completed = attempts.filter(completed_at__isnull=False)
+        
+        queryset = self.annotate(
+            attempt_count=Coalesce(Subquery(attempts.annotate(total=Count('pk')).values('total')), 0),
+            average_score=Subquery(completed.annotate(avg=Avg('score')).values('avg')),
+        )
+        
+        if user is not None and user.is_authenticated:
+            own_attempts = attempts.filter(student=user)
+            queryset = queryset.annotate(
+                is_attempted=Exists(own_attempts),
+                best_score=Subquery(
+                    own_attempts.filter(completed_at__isnull=False)
+                    .annotate(best=Max('score')).values('best')
+                ),
+            )
+        return queryset
+    
+    def refresh_question_totals(self):
+        """Recompute the denormalized active question count and point total"""
+        active_questions = Question.objects.filter(
+            quiz=OuterRef('pk'), is_active=True
+        ).order_by().values('quiz')
+        return self.update(
+            active_question_count=Coalesce(Subquery(
+                active_questions.annotate(total=Count('pk')).values('total')
+            ), 0),
+            total_points=Coalesce(Subquery(
+                active_questions.annotate(total=Sum('points')).values('total')
+            ), 0),
+        )
+
+
 class Quiz(models.Model):
     """Quiz model for assessments"""
     title = models.CharField(max_length=200)
@@ -23,10 +89,14 @@ class Quiz(models.Model):
     is_active = models.BooleanField(default=True)
     is_premium = models.BooleanField(default=False)
     instructions = models.TextField(blank=True, null=True)
+    active_question_count = models.IntegerField(default=0)  # Maintained by Question signals
+    total_points = models.IntegerField(default=0)  # Maintained by Question signals
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = QuizQuerySet.as_manager()
+    
     class Meta:
         db_table = 'quizzes'
         indexes = [
@@ -37,8 +107,27 @@ class Quiz(models.Model):
         ]
         ordering = ['-created_at']
     
+    # Only written by QuizQuerySet.refresh_question_totals()
+    QUESTION_TOTAL_FIELDS = ('active_question_count', 'total_points')
+    
     def __str__(self):
         return f"{self.title} - {self.subject.name}"
+    
+    def save(self, *args, **kwargs):
+        # A stale instance must not overwrite totals refreshed by Question
+        # signals. Explicit update_fields and forced inserts are left alone,
+        # and deferred fields stay unsaved as they would in Model.save().
+        if (
+            not self._state.adding and not args
+            and kwargs.get('update_fields') is None and not kwargs.get('force_insert')
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+                and field.name not in self.QUESTION_TOTAL_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class Question(models.Model):
@@ -100,7 +189,9 @@ class QuizAttempt(models.Model):
     class Meta:
         db_table = 'quiz_attempts'
         indexes = [
-            models.Index(fields=['student']),
+            models.Index(fields=['student', 'quiz', 'completed_at']),
+            models.Index(fields=['student', 'quiz', '-score'], name='qa_best_score_idx'),
+            models.Index(fields=['student', '-started_at']),
             models.Index(fields=['quiz']),
             models.Index(fields=['completed_at']),
             models.Index(fields=['is_passed']),
@@ -111,16 +202,21 @@ class QuizAttempt(models.Model):
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.quiz.title} - {self.started_at}"
     
-    def calculate_score(self):
-        """Calculate and update quiz score"""
+    def calculate_score(self, update_fields=()):
+        """
+        Calculate the quiz score and save it together with completed_at.
+        
+        update_fields names any other columns the caller changed, so completing
+        an attempt stays a single UPDATE.
+        """
         if self.completed_at:
-            total_points = sum(q.points for q in self.quiz.questions.filter(is_active=True))
-            earned_points = sum(answer.points_earned for answer in self.answers.all())
+            total_points = self.quiz.total_points
+            earned_points = self.answers.aggregate(total=Sum('points_earned'))['total'] or 0
             
             if total_points > 0:
                 self.score = (earned_points / total_points) * 100
                 self.is_passed = self.score >= self.quiz.passing_score
-                self.save(update_fields=['score', 'is_passed'])
+            self.save(update_fields=['completed_at', 'score', 'is_passed', *update_fields])
     
     def get_time_spent_display(self):
         """Get formatted time spent"""
@@ -173,6 +269,9 @@ class QuizSession(models.Model):
     """Model for tracking active quiz sessions"""
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_sessions')
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='sessions')
+    attempt = models.OneToOneField(
+        QuizAttempt, on_delete=models.CASCADE, related_name='session', null=True, blank=True
+    )
     session_key = models.CharField(max_length=40, unique=True)
     current_question_index = models.IntegerField(default=0)
     answers_data = models.JSONField(default=dict)  # Store answers temporarily
@@ -185,7 +284,6 @@ class QuizSession(models.Model):
         indexes = [
             models.Index(fields=['student']),
             models.Index(fields=['quiz']),
-            models.Index(fields=['session_key']),
             models.Index(fields=['is_active']),
         ]
     
@@ -226,6 +324,9 @@ class QuizAnalytics(models.Model):
     common_mistakes = models.JSONField(default=list)
     last_updated = models.DateTimeField(auto_now=True)
     
+    # How long computed numbers are served before update_analytics runs again
+    REFRESH_INTERVAL = timedelta(minutes=5)
+    
     class Meta:
         db_table = 'quiz_analytics'
         unique_together = ['quiz']
@@ -233,18 +334,26 @@ class QuizAnalytics(models.Model):
     def __str__(self):
         return f"Analytics for {self.quiz.title}"
     
+    def is_stale(self):
+        """Whether the stored numbers are older than REFRESH_INTERVAL"""
+        return self.last_updated is None or timezone.now() - self.last_updated > self.REFRESH_INTERVAL
+    
     def update_analytics(self):
         """Update quiz analytics based on attempts"""
-        attempts = self.quiz.attempts.filter(completed_at__isnull=False)
+        stats = self.quiz.attempts.filter(completed_at__isnull=False).aggregate(
+            total=Count('id'),
+            passed=Count('id', filter=models.Q(is_passed=True)),
+            avg_score=Avg('score'),
+            avg_time=Avg('time_spent'),
+        )
         
-        self.total_attempts = attempts.count()
-        self.total_completions = attempts.filter(is_passed=True).count()
+        self.total_attempts = stats['total']
+        self.total_completions = stats['passed']
         
         if self.total_attempts > 0:
-            self.average_score = attempts.aggregate(avg_score=models.Avg('score'))['avg_score'] or 0
+            self.average_score = stats['avg_score'] or 0
             self.pass_rate = (self.total_completions / self.total_attempts) * 100
-            self.average_time = attempts.aggregate(avg_time=models.Avg('time_spent'))['avg_time'] or 0
-            self.average_time = self.average_time / 60  # Convert to minutes
+            self.average_time = (stats['avg_time'] or 0) / 60  # Convert to minutes
         
         self.save()
 
@@ -2,7 +2,9 @@
 Serializers for quiz and assessment functionality.
 """
 from rest_framework import serializers
-from django.db.models import Avg, Count
+from django.db import transaction
+from django.db.models import Avg, Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from .models import (
     Quiz, Question, QuizAttempt, Answer, QuizResult,
     QuizSession, QuizFeedback, QuizAnalytics
@@ -10,6 +12,20 @@ from .models import (
 from apps.content.serializers import LessonSerializer, SubjectSerializer
 from apps.accounts.serializers import UserProfileSerializer
 
+TRUE_FALSE_ANSWERS = frozenset({'true', 'false'})
+
+
+class MinutesSecondsField(serializers.Field):
+    """Read-only field rendering seconds as "5m 30s", like QuizAttempt.get_time_spent_display"""
+    
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, value):
+        minutes, seconds = divmod(value, 60)
+        return f"{minutes}m {seconds}s"
+
 
 class QuestionSerializer(serializers.ModelSerializer):
     """Serializer for Question model"""
@@ -52,26 +68,35 @@ class QuizSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_question_count(self, obj):
-        return obj.questions.filter(is_active=True).count()
+        return obj.active_question_count
     
     def get_average_score(self, obj):
-        avg_score = obj.attempts.filter(
-            completed_at__isnull=False
-        ).aggregate(avg_score=Avg('score'))['avg_score']
+        if hasattr(obj, 'average_score'):
+            avg_score = obj.average_score
+        else:
+            avg_score = obj.attempts.filter(
+                completed_at__isnull=False
+            ).aggregate(avg_score=Avg('score'))['avg_score']
         return round(avg_score, 2) if avg_score else 0
     
     def get_attempt_count(self, obj):
+        if hasattr(obj, 'attempt_count'):
+            return obj.attempt_count
         return obj.attempts.count()
     
     def get_is_attempted(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'is_attempted'):
+                return obj.is_attempted
             return obj.attempts.filter(student=request.user).exists()
         return False
     
     def get_best_score(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'best_score'):
+                return obj.best_score
             best_attempt = obj.attempts.filter(
                 student=request.user,
                 completed_at__isnull=False
@@ -80,6 +105,25 @@ class QuizSerializer(serializers.ModelSerializer):
         return None
 
 
+class QuizListSerializer(QuizSerializer):
+    """Quiz serializer for list pages, without the long text fields"""
+    
+    class Meta(QuizSerializer.Meta):
+        fields = [
+            field for field in QuizSerializer.Meta.fields
+            if field not in ('description', 'instructions')
+        ]
+
+
+class QuizMinimalSerializer(serializers.ModelSerializer):
+    """Lightweight Quiz serializer for nesting inside attempt payloads"""
+    
+    class Meta:
+        model = Quiz
+        fields = ['id', 'title', 'passing_score']
+        read_only_fields = fields
+
+
 class QuizDetailSerializer(QuizSerializer):
     """Detailed serializer for Quiz with questions"""
     questions = QuestionSerializer(many=True, read_only=True)
@@ -104,9 +148,9 @@ class AnswerSerializer(serializers.ModelSerializer):
 class QuizAttemptSerializer(serializers.ModelSerializer):
     """Serializer for QuizAttempt model"""
     student = UserProfileSerializer(read_only=True)
-    quiz = QuizSerializer(read_only=True)
+    quiz = QuizMinimalSerializer(read_only=True)
     answers = AnswerSerializer(many=True, read_only=True)
-    time_spent_display = serializers.CharField(source='get_time_spent_display', read_only=True)
+    time_spent_display = MinutesSecondsField(source='time_spent')
     score_percentage = serializers.SerializerMethodField()
     
     class Meta:
@@ -128,6 +172,13 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         return None
 
 
+class QuizAttemptListSerializer(QuizAttemptSerializer):
+    """QuizAttempt serializer for list endpoints, without per-answer detail"""
+    
+    class Meta(QuizAttemptSerializer.Meta):
+        fields = [field for field in QuizAttemptSerializer.Meta.fields if field != 'answers']
+
+
 class QuizAttemptCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating quiz attempts"""
     
@@ -139,42 +190,44 @@ class QuizAttemptCreateSerializer(serializers.ModelSerializer):
         student = self.context['request'].user
         quiz = validated_data['quiz']
         
-        # Check if student has reached max attempts
-        attempt_count = QuizAttempt.objects.filter(
-            student=student,
-            quiz=quiz
-        ).count()
+        # Attempts used and active session in one round trip
+        stats = Quiz.objects.filter(pk=quiz.pk).annotate(
+            attempts_used=Coalesce(Subquery(
+                QuizAttempt.objects.filter(quiz=OuterRef('pk'), student=student)
+                .order_by().values('quiz').annotate(total=Count('pk')).values('total')
+            ), 0),
+            has_active_session=Exists(QuizSession.objects.filter(
+                quiz=OuterRef('pk'), student=student, is_active=True
+            )),
+        ).values('attempts_used', 'has_active_session').get()
         
-        if attempt_count >= quiz.max_attempts:
+        # Check if student has reached max attempts
+        if stats['attempts_used'] >= quiz.max_attempts:
             raise serializers.ValidationError(
                 f"You have reached the maximum number of attempts ({quiz.max_attempts}) for this quiz."
             )
         
         # Check if student has an active session
-        active_session = QuizSession.objects.filter(
-            student=student,
-            quiz=quiz,
-            is_active=True
-        ).first()
-        
-        if active_session:
+        if stats['has_active_session']:
             raise serializers.ValidationError(
                 "You have an active quiz session. Please complete or abandon it first."
             )
         
-        # Create new attempt
-        attempt = QuizAttempt.objects.create(
-            student=student,
-            quiz=quiz,
-            total_questions=quiz.questions.filter(is_active=True).count()
-        )
-        
-        # Create quiz session
-        QuizSession.objects.create(
-            student=student,
-            quiz=quiz,
-            session_key=f"{student.id}_{quiz.id}_{attempt.id}"
-        )
+        with transaction.atomic():
+            # Create new attempt
+            attempt = QuizAttempt.objects.create(
+                student=student,
+                quiz=quiz,
+                total_questions=quiz.active_question_count
+            )
+            
+            # Create quiz session
+            QuizSession.objects.create(
+                student=student,
+                quiz=quiz,
+                attempt=attempt,
+                session_key=f"{student.id}_{quiz.id}_{attempt.id}"
+            )
         
         return attempt
 
@@ -196,15 +249,21 @@ class QuizSessionSerializer(serializers.ModelSerializer):
             'id', 'session_key', 'started_at', 'last_activity', 'is_active'
         ]
     
+    def _active_questions(self, obj):
+        questions = getattr(obj.quiz, 'active_questions', None)
+        if questions is None:
+            questions = list(obj.quiz.questions.filter(is_active=True).order_by('order_index'))
+            obj.quiz.active_questions = questions
+        return questions
+    
     def get_current_question(self, obj):
-        questions = obj.quiz.questions.filter(is_active=True).order_by('order_index')
-        if obj.current_question_index < questions.count():
-            question = questions[obj.current_question_index]
-            return QuestionSerializer(question).data
+        questions = self._active_questions(obj)
+        if 0 <= obj.current_question_index < len(questions):
+            return QuestionSerializer(questions[obj.current_question_index]).data
         return None
     
     def get_progress(self, obj):
-        total_questions = obj.quiz.questions.filter(is_active=True).count()
+        total_questions = len(self._active_questions(obj))
         if total_questions > 0:
             return round((obj.current_question_index / total_questions) * 100, 2)
         return 0
@@ -218,20 +277,24 @@ class SubmitAnswerSerializer(serializers.Serializer):
     
     def validate_question_id(self, value):
         try:
-            question = Question.objects.get(id=value, is_active=True)
+            # Only the columns grading and the submit response use
+            self._question = Question.objects.only(
+                'id', 'question_type', 'correct_answer', 'points', 'explanation'
+            ).get(id=value, is_active=True)
             return value
         except Question.DoesNotExist:
             raise serializers.ValidationError("Invalid question ID")
     
     def validate(self, attrs):
-        question = Question.objects.get(id=attrs['question_id'])
+        question = self._question
+        attrs['question'] = question
         
         # Validate answer based on question type
         if question.question_type == 'MULTIPLE_CHOICE':
             if not attrs.get('answer_text'):
                 raise serializers.ValidationError("Answer is required for multiple choice questions")
         elif question.question_type == 'TRUE_FALSE':
-            if attrs.get('answer_text') not in ['true', 'false', 'True', 'False']:
+            if (attrs.get('answer_text') or '').lower() not in TRUE_FALSE_ANSWERS:
                 raise serializers.ValidationError("Answer must be 'true' or 'false'")
         elif question.question_type in ['FILL_IN_BLANK', 'SHORT_ANSWER']:
             if not attrs.get('answer_text'):
@@ -266,16 +329,13 @@ class QuizFeedbackSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'attempt', 'created_at']
     
     def create(self, validated_data):
-        attempt_id = self.context['request'].data.get('attempt')
-        if attempt_id:
-            # Check if feedback already exists
-            existing_feedback = QuizFeedback.objects.filter(attempt_id=attempt_id).first()
-            if existing_feedback:
-                # Update existing feedback
-                for key, value in validated_data.items():
-                    setattr(existing_feedback, key, value)
-                existing_feedback.save()
-                return existing_feedback
+        attempt = validated_data.pop('attempt', None)
+        if attempt is not None:
+            # One feedback per attempt: update it in place if it already exists
+            feedback, _ = QuizFeedback.objects.update_or_create(
+                attempt=attempt, defaults=validated_data
+            )
+            return feedback
         
         return super().create(validated_data)
 
@@ -1,40 +1,59 @@
 """
 Views for quiz and assessment functionality.
 """
+from functools import lru_cache
+import logging
+
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Q, Avg, Count, Sum
+from django.db.models import (
+    F, Func, JSONField, Q, Value, Avg, Count, Sum, Prefetch, prefetch_related_objects
+)
+from django.db import transaction
+from django.db.models.functions import Cast
 from django.utils import timezone
 from django.core.cache import cache
 from .models import (
     Quiz, Question, QuizAttempt, Answer, QuizResult,
-    QuizSession, QuizFeedback, QuizAnalytics
+    QuizSession, QuizFeedback, QuizAnalytics, ACTIVE_QUIZ_COUNT_KEY, QUIZ_ANALYTICS_CACHE_KEY,
+    get_active_question_ids
 )
 from .serializers import (
-    QuizSerializer, QuizDetailSerializer, QuizAttemptSerializer,
-    QuizAttemptCreateSerializer, QuizSessionSerializer,
+    QuizListSerializer, QuizDetailSerializer, QuizAttemptSerializer,
+    QuizAttemptListSerializer, QuizAttemptCreateSerializer, QuizSessionSerializer,
     SubmitAnswerSerializer, QuizResultSerializer,
-    QuizFeedbackSerializer, QuizAnalyticsSerializer,
-    QuizStatsSerializer
+    QuizFeedbackSerializer, QuizAnalyticsSerializer
 )
-from apps.accounts.models import User
-import logging
-import uuid
+from apps.progress.etags import progress_cache_key
 
 logger = logging.getLogger(__name__)
 
+# Per-user quiz stats are keyed on the progress version, so the timeout only
+# bounds how long an unused entry lingers.
+QUIZ_STATS_CACHE_TIMEOUT = 300
+ACTIVE_QUIZ_COUNT_TIMEOUT = 300
+QUIZ_ANALYTICS_CACHE_TIMEOUT = 120
+# Session columns the answer/complete/abandon views touch; skips answers_data.
+# last_activity is listed so the auto_now bump survives a deferred save().
+SESSION_STATE_FIELDS = [
+    'id', 'quiz', 'student', 'attempt', 'session_key', 'current_question_index',
+    'last_activity', 'is_active'
+]
+
 
 class QuizListView(generics.ListAPIView):
     """List quizzes for a subject or grade level"""
-    serializer_class = QuizSerializer
+    serializer_class = QuizListSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Quiz.objects.filter(is_active=True).select_related(
-            'subject', 'lesson', 'created_by'
-        ).prefetch_related('questions', 'attempts')
+        queryset = Quiz.objects.filter(is_active=True).only(
+            'id', 'title', 'subject', 'lesson', 'grade_level', 'time_limit',
+            'max_attempts', 'passing_score', 'is_active', 'is_premium',
+            'active_question_count', 'created_at', 'updated_at'
+        ).with_stats(user).select_related('subject', 'lesson')
         
         # Filter by grade level for students
         if user.is_student() and user.grade_level:
@@ -59,21 +78,19 @@ class QuizDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Quiz.objects.filter(is_active=True).select_related(
+        return Quiz.objects.filter(is_active=True).with_stats(self.request.user).select_related(
             'subject', 'lesson'
         ).prefetch_related('questions')
 
 
 class QuizAttemptListView(generics.ListAPIView):
     """List user's quiz attempts"""
-    serializer_class = QuizAttemptSerializer
+    serializer_class = QuizAttemptListSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         user = self.request.user
-        queryset = QuizAttempt.objects.filter(student=user).select_related(
-            'quiz__subject', 'quiz__lesson'
-        ).prefetch_related('answers__question')
+        queryset = QuizAttempt.objects.filter(student=user).select_related('quiz', 'student')
         
         # Filter by quiz if provided
         quiz_id = self.request.query_params.get('quiz')
@@ -106,31 +123,40 @@ class QuizSessionView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
+        # answers_data isn't part of the session payload
         return QuizSession.objects.filter(
             student=self.request.user,
             is_active=True
-        ).select_related('quiz')
+        ).defer('answers_data').prefetch_related(
+            Prefetch('quiz', queryset=Quiz.objects.with_stats(self.request.user).select_related(
+                'subject', 'lesson'
+            )),
+            Prefetch(
+                'quiz__questions',
+                queryset=Question.objects.filter(is_active=True).order_by('order_index'),
+                to_attr='active_questions'
+            )
+        )
     
     def get_object(self):
         session_key = self.kwargs.get('session_key')
-        return QuizSession.objects.get(
-            session_key=session_key,
-            student=self.request.user,
-            is_active=True
-        )
+        return self.get_queryset().get(session_key=session_key)
+
+
+def get_active_session(user, session_key, fields=None):
+    """Return the user's active session for session_key, or None"""
+    queryset = QuizSession.objects.filter(session_key=session_key, student=user, is_active=True)
+    if fields:
+        queryset = queryset.only(*fields)
+    return queryset.first()
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def submit_answer(request, session_key):
     """Submit an answer for the current question in a quiz session"""
-    try:
-        session = QuizSession.objects.get(
-            session_key=session_key,
-            student=request.user,
-            is_active=True
-        )
-    except QuizSession.DoesNotExist:
+    session = get_active_session(request.user, session_key, fields=SESSION_STATE_FIELDS)
+    if session is None:
         return Response({
             'error': 'Active quiz session not found'
         }, status=status.HTTP_404_NOT_FOUND)
@@ -140,59 +166,66 @@ def submit_answer(request, session_key):
         question_id = serializer.validated_data['question_id']
         answer_text = serializer.validated_data.get('answer_text', '')
         time_spent = serializer.validated_data.get('time_spent', 0)
-        
-        try:
-            question = Question.objects.get(id=question_id, is_active=True)
-        except Question.DoesNotExist:
-            return Response({
-                'error': 'Question not found'
-            }, status=status.HTTP_404_NOT_FOUND)
+        question = serializer.validated_data['question']
         
         # Check if this is the current question
-        questions = session.quiz.questions.filter(is_active=True).order_by('order_index')
-        if session.current_question_index >= questions.count():
+        question_ids = get_active_question_ids(session.quiz_id)
+        if session.current_question_index >= len(question_ids):
             return Response({
                 'error': 'Quiz already completed'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        current_question = questions[session.current_question_index]
-        if current_question.id != question_id:
+        if question_ids[session.current_question_index] != question_id:
             return Response({
                 'error': 'This is not the current question'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create or update answer
-        answer, created = Answer.objects.get_or_create(
-            attempt=session.attempt,
-            question=question,
-            defaults={
-                'answer_text': answer_text,
-                'time_spent': time_spent
-            }
-        )
-        
-        if not created:
-            answer.answer_text = answer_text
-            answer.time_spent = time_spent
-            answer.save()
-        
-        # Check if answer is correct
         is_correct = check_answer_correctness(question, answer_text)
-        answer.is_correct = is_correct
-        answer.points_earned = question.points if is_correct else 0
-        answer.save()
-        
-        # Update session
-        session.current_question_index += 1
-        session.answers_data[str(question_id)] = {
+        answer_data = {
             'answer': answer_text,
             'is_correct': is_correct,
             'time_spent': time_spent
         }
-        session.save()
+        
+        with transaction.atomic():
+            # Advance only from the index this request validated against, so a
+            # repeated submit of the same question can't skip the next one.
+            # answers_data gets just this question's key set.
+            current_index = session.current_question_index
+            session.last_activity = timezone.now()
+            advanced = QuizSession.objects.filter(
+                pk=session.pk, is_active=True, current_question_index=current_index
+            ).update(
+                current_question_index=current_index + 1,
+                answers_data=Func(
+                    F('answers_data'),
+                    Value([str(question_id)]),
+                    Cast(Value(answer_data, output_field=JSONField()), JSONField()),
+                    function='jsonb_set',
+                    output_field=JSONField()
+                ),
+                last_activity=session.last_activity
+            )
+            if not advanced:
+                return Response({
+                    'error': 'This question has already been answered'
+                }, status=status.HTTP_409_CONFLICT)
+            
+            Answer.objects.update_or_create(
+                attempt_id=session.attempt_id,
+                question=question,
+                defaults={
+                    'answer_text': answer_text,
+                    'time_spent': time_spent,
+                    'is_correct': is_correct,
+                    'points_earned': question.points if is_correct else 0
+                }
+            )
+        session.current_question_index = current_index + 1
         
         # Check if quiz is completed
-        if session.current_question_index >= questions.count():
+        is_completed = session.current_question_index >= len(question_ids)
+        if is_completed:
             complete_quiz_attempt(session)
         
         return Response({
@@ -200,7 +233,7 @@ def submit_answer(request, session_key):
             'is_correct': is_correct,
             'explanation': question.explanation if is_correct else None,
             'next_question_index': session.current_question_index,
-            'is_completed': session.current_question_index >= questions.count()
+            'is_completed': is_completed
         }, status=status.HTTP_200_OK)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -210,13 +243,8 @@ def submit_answer(request, session_key):
 @permission_classes([permissions.IsAuthenticated])
 def complete_quiz(request, session_key):
     """Complete a quiz attempt"""
-    try:
-        session = QuizSession.objects.get(
-            session_key=session_key,
-            student=request.user,
-            is_active=True
-        )
-    except QuizSession.DoesNotExist:
+    session = get_active_session(request.user, session_key, fields=SESSION_STATE_FIELDS)
+    if session is None:
         return Response({
             'error': 'Active quiz session not found'
         }, status=status.HTTP_404_NOT_FOUND)
@@ -227,6 +255,12 @@ def complete_quiz(request, session_key):
     # Generate detailed result
     result = generate_quiz_result(attempt)
     
+    # Both payloads render this attempt's answers; load them once and share the instance
+    prefetch_related_objects(
+        [attempt], Prefetch('answers', queryset=Answer.objects.select_related('question'))
+    )
+    result.attempt = attempt
+    
     return Response({
         'message': 'Quiz completed successfully',
         'attempt': QuizAttemptSerializer(attempt).data,
@@ -238,13 +272,8 @@ def complete_quiz(request, session_key):
 @permission_classes([permissions.IsAuthenticated])
 def abandon_quiz(request, session_key):
     """Abandon a quiz attempt"""
-    try:
-        session = QuizSession.objects.get(
-            session_key=session_key,
-            student=request.user,
-            is_active=True
-        )
-    except QuizSession.DoesNotExist:
+    session = get_active_session(request.user, session_key, fields=SESSION_STATE_FIELDS)
+    if session is None:
         return Response({
             'error': 'Active quiz session not found'
         }, status=status.HTTP_404_NOT_FOUND)
@@ -253,11 +282,12 @@ def abandon_quiz(request, session_key):
     attempt = session.attempt
     attempt.is_abandoned = True
     attempt.completed_at = timezone.now()
-    attempt.save()
+    attempt.calculate_score(update_fields=['is_abandoned'])
     
     # Deactivate session
     session.is_active = False
     session.save()
+    cache.delete(QUIZ_ANALYTICS_CACHE_KEY.format(session.quiz_id))
     
     logger.info(f"Quiz abandoned: {request.user.username} - {attempt.quiz.title}")
     
@@ -274,7 +304,9 @@ class QuizFeedbackView(generics.ListCreateAPIView):
     def get_queryset(self):
         return QuizFeedback.objects.filter(
             attempt__student=self.request.user
-        ).select_related('attempt__quiz')
+        ).select_related('attempt__quiz', 'attempt__student').prefetch_related(
+            Prefetch('attempt__answers', queryset=Answer.objects.select_related('question'))
+        )
     
     def perform_create(self, serializer):
         attempt_id = self.request.data.get('attempt')
@@ -296,14 +328,24 @@ def quiz_stats(request):
     """Get user's quiz statistics"""
     user = request.user
     
-    # Get user's attempts
-    attempts = QuizAttempt.objects.filter(
-        student=user,
-        completed_at__isnull=False
-    ).select_related('quiz__subject')
+    # Attempt saves bump the student's progress version, which retires this key
+    cache_key = progress_cache_key('quiz_stats', user.id)
+    stats = cache.get(cache_key)
+    if stats is not None:
+        return Response(stats, status=status.HTTP_200_OK)
+    
+    # Get user's attempt totals in one pass
+    completed = Q(completed_at__isnull=False)
+    totals = QuizAttempt.objects.filter(student=user).aggregate(
+        total_attempts=Count('id'),
+        completed_quizzes=Count('id', filter=completed),
+        average_score=Avg('score', filter=completed),
+        passed_quizzes=Count('id', filter=completed & Q(is_passed=True)),
+        total_time_spent=Sum('time_spent', filter=completed)
+    )
     
-    if not attempts.exists():
-        return Response({
+    if not totals['completed_quizzes']:
+        stats = {
             'total_quizzes': 0,
             'completed_quizzes': 0,
             'average_score': 0,
@@ -313,38 +355,38 @@ def quiz_stats(request):
             'total_time_spent': 0,
             'favorite_subject': None,
             'improvement_areas': []
-        })
+        }
+        cache.set(cache_key, stats, QUIZ_STATS_CACHE_TIMEOUT)
+        return Response(stats)
     
     # Calculate statistics
-    total_quizzes = Quiz.objects.filter(is_active=True).count()
-    completed_quizzes = attempts.count()
-    average_score = attempts.aggregate(avg_score=Avg('score'))['avg_score'] or 0
-    total_attempts = QuizAttempt.objects.filter(student=user).count()
-    passed_quizzes = attempts.filter(is_passed=True).count()
+    total_quizzes = cache.get_or_set(
+        ACTIVE_QUIZ_COUNT_KEY,
+        lambda: Quiz.objects.filter(is_active=True).count(),
+        ACTIVE_QUIZ_COUNT_TIMEOUT
+    )
+    completed_quizzes = totals['completed_quizzes']
+    average_score = totals['average_score'] or 0
+    total_attempts = totals['total_attempts']
+    passed_quizzes = totals['passed_quizzes']
     failed_quizzes = completed_quizzes - passed_quizzes
-    total_time_spent = attempts.aggregate(total_time=Sum('time_spent'))['total_time'] or 0
+    total_time_spent = totals['total_time_spent'] or 0
+    
+    # One row per subject: its average score and how many attempts scored below 70
+    subject_rows = list(
+        QuizAttempt.objects.filter(completed, student=user)
+        .values('quiz__subject__name')
+        .annotate(avg_score=Avg('score'), low_scores=Count('id', filter=Q(score__lt=70)))
+        .order_by()
+    )
     
     # Find favorite subject
-    subject_scores = {}
-    for attempt in attempts:
-        subject = attempt.quiz.subject.name
-        if subject not in subject_scores:
-            subject_scores[subject] = []
-        subject_scores[subject].append(attempt.score)
-    
-    favorite_subject = None
-    if subject_scores:
-        avg_scores = {subject: sum(scores)/len(scores) for subject, scores in subject_scores.items()}
-        favorite_subject = max(avg_scores, key=avg_scores.get)
+    favorite_subject = max(
+        subject_rows, key=lambda row: row['avg_score'] or 0
+    )['quiz__subject__name']
     
     # Identify improvement areas
-    improvement_areas = []
-    low_score_attempts = attempts.filter(score__lt=70)
-    if low_score_attempts.exists():
-        subjects_needing_improvement = set()
-        for attempt in low_score_attempts:
-            subjects_needing_improvement.add(attempt.quiz.subject.name)
-        improvement_areas = list(subjects_needing_improvement)
+    improvement_areas = [row['quiz__subject__name'] for row in subject_rows if row['low_scores']]
     
     stats = {
         'total_quizzes': total_quizzes,
@@ -357,6 +399,7 @@ def quiz_stats(request):
         'favorite_subject': favorite_subject,
         'improvement_areas': improvement_areas
     }
+    cache.set(cache_key, stats, QUIZ_STATS_CACHE_TIMEOUT)
     
     return Response(stats, status=status.HTTP_200_OK)
 
@@ -377,28 +420,54 @@ def quiz_analytics(request, quiz_id):
             'error': 'Quiz not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Get or create analytics
-    analytics, created = QuizAnalytics.objects.get_or_create(quiz=quiz)
-    analytics.update_analytics()
+    cache_key = QUIZ_ANALYTICS_CACHE_KEY.format(quiz.pk)
+    data = cache.get(cache_key)
+    if data is not None:
+        return Response(data, status=status.HTTP_200_OK)
     
-    serializer = QuizAnalyticsSerializer(analytics)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # Get or create analytics
+    analytics, created = QuizAnalytics.objects.select_related(
+        'quiz__subject', 'quiz__lesson'
+    ).get_or_create(quiz=quiz)
+    if created or analytics.is_stale():
+        analytics.update_analytics()
+    
+    data = QuizAnalyticsSerializer(analytics).data
+    cache.set(cache_key, data, QUIZ_ANALYTICS_CACHE_TIMEOUT)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@lru_cache(maxsize=4096)
+def normalized_correct_answer(question_type, correct_answer):
+    """
+    Lowercased form of a correct answer, computed once per distinct answer.
+    
+    FILL_IN_BLANK takes a tuple of accepted answers and returns a frozenset of
+    stripped ones; every other type takes and returns a string.
+    """
+    if question_type == 'FILL_IN_BLANK':
+        return frozenset(answer.lower().strip() for answer in correct_answer)
+    return correct_answer.lower()
 
 
 def check_answer_correctness(question, answer_text):
     """Check if the provided answer is correct"""
-    if question.question_type == 'MULTIPLE_CHOICE':
-        return answer_text.lower() == str(question.correct_answer).lower()
-    elif question.question_type == 'TRUE_FALSE':
-        return answer_text.lower() == str(question.correct_answer).lower()
+    if question.question_type == 'FILL_IN_BLANK':
+        correct_answers = question.correct_answer
+        key = tuple(correct_answers) if isinstance(correct_answers, list) else (correct_answers,)
+    else:
+        key = str(question.correct_answer)
+    
+    if question.question_type in ('MULTIPLE_CHOICE', 'TRUE_FALSE'):
+        return answer_text.lower() == normalized_correct_answer(question.question_type, key)
     elif question.question_type == 'FILL_IN_BLANK':
-        # For fill in the blank, check if answer is in the correct answers list
-        correct_answers = question.correct_answer if isinstance(question.correct_answer, list) else [question.correct_answer]
-        return answer_text.lower().strip() in [ans.lower().strip() for ans in correct_answers]
+        # For fill in the blank, check if answer is in the correct answers set
+        return answer_text.lower().strip() in normalized_correct_answer(question.question_type, key)
     elif question.question_type == 'SHORT_ANSWER':
         # For short answer, do a more flexible comparison
-        correct_answer = str(question.correct_answer).lower()
-        return answer_text.lower().strip() in correct_answer or correct_answer in answer_text.lower().strip()
+        correct_answer = normalized_correct_answer(question.question_type, key)
+        answer = answer_text.lower().strip()
+        return answer in correct_answer or correct_answer in answer
     
     return False
 
@@ -412,6 +481,7 @@ def complete_quiz_attempt(session):
     # Deactivate session
     session.is_active = False
     session.save()
+    cache.delete(QUIZ_ANALYTICS_CACHE_KEY.format(session.quiz_id))
     
     logger.info(f"Quiz completed: {attempt.student.username} - {attempt.quiz.title} - Score: {attempt.score}")
     
@@ -428,14 +498,16 @@ def generate_quiz_result(attempt):
     average_time_per_question = total_time / total_questions if total_questions > 0 else 0
     
     # Analyze performance by difficulty
-    difficulty_breakdown = {}
-    for answer in attempt.answers.all():
-        difficulty = answer.question.difficulty_level
-        if difficulty not in difficulty_breakdown:
-            difficulty_breakdown[difficulty] = {'correct': 0, 'total': 0}
-        difficulty_breakdown[difficulty]['total'] += 1
-        if answer.is_correct:
-            difficulty_breakdown[difficulty]['correct'] += 1
+    rows = Answer.objects.filter(attempt=attempt).values(
+        'question__difficulty_level'
+    ).annotate(
+        correct=Count('id', filter=Q(is_correct=True)),
+        total=Count('id')
+    ).order_by('question__difficulty_level')
+    difficulty_breakdown = {
+        row['question__difficulty_level']: {'correct': row['correct'], 'total': row['total']}
+        for row in rows
+    }
     
     # Generate improvement suggestions
     improvement_suggestions = []
@@ -0,0 +1,31 @@
+"""
+Response renderers for Learning Cloud API.
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback_encoder = JSONEncoder()
+
+
+def _default(obj):
+    """Encode types orjson doesn't know (Decimal, lazy strings, querysets...) like DRF does"""
+    return _fallback_encoder.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Produces the same payloads as DRF's JSONRenderer but encodes in C, which
+    matters on endpoints returning many datetime/float fields.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_UTC_Z
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default, option=self.options)
@@ -1,13 +1,4 @@
-from drf_spectacular.utils import extend_schema, extend_schema_view
-from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.openapi import AutoSchema
 from rest_framework import serializers
-from .accounts.serializers import UserProfileSerializer
-from .content.serializers import SubjectSerializer, ChapterSerializer, LessonSerializer
-from .quizzes.serializers import QuizSerializer, QuizAttemptSerializer
-from .progress.serializers import StudentProgressSerializer
-from .analytics.serializers import AnalyticsSerializer
-from .notifications.serializers import NotificationSerializer
 
 
 # Use default AutoSchema for simplicity
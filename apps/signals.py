@@ -1,65 +1,124 @@
 """
 Django signal handlers for Learning Cloud API.
 Handles automatic functionality triggered by model events.
+
+Handlers with side effects skip partial saves whose update_fields don't
+include the fields they react to, so callers that only touch bookkeeping
+columns should pass update_fields to save(). Celery tasks and cache
+updates are deferred with transaction.on_commit so rolled-back writes
+never reach workers or caches.
 """
+from functools import partial
+
+from django.db import transaction
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.core.cache import cache
 import logging
 
-from apps.accounts.models import User
+from apps.accounts.models import User, School
 from apps.content.models import Lesson, Subject
-from apps.quizzes.models import Quiz, QuizAttempt, QuizResult
+from apps.quizzes.models import (
+    Quiz, Question, QuizAttempt, QuizResult, QuizAnalytics,
+    ACTIVE_QUIZ_COUNT_KEY, QUESTION_IDS_CACHE_KEY, QUIZ_ANALYTICS_CACHE_KEY
+)
 from apps.progress.models import (
     StudentProgress, LearningStreak, SubjectProgress, 
     GradeProgress, ProgressMilestone
 )
-from apps.analytics.models import Analytics
-from apps.notifications.models import Notification, NotificationPreference
-from apps.tasks import (
-    send_notification_email, update_learning_streaks, 
-    check_and_create_milestones, update_quiz_analytics,
-    update_subject_progress, update_grade_progress
+from apps.progress.etags import bump_progress_version, bump_shared_progress_version
+from apps.progress.coalesce import mark_student_dirty
+from apps.analytics.buffer import record_analytics
+from apps.notifications.models import (
+    Notification, NotificationPreference, UNREAD_COUNT_CACHE_KEY, adjust_unread_count
 )
+from apps.tasks import send_notification_email, update_quiz_analytics
 
 logger = logging.getLogger(__name__)
 
+STREAK_MILESTONE_DAYS = frozenset({7, 30, 100})
 
-@receiver(post_save, sender=User)
-def create_user_notification_preferences(sender, instance, created, **kwargs):
-    """Create notification preferences when a new user is created"""
+
+@receiver(post_save, sender=User, dispatch_uid='apps.signals.handle_user_saved')
+def handle_user_saved(sender, instance, created, **kwargs):
+    """Single post_save entry point for users: creation, logins and role changes"""
+    if kwargs.get('update_fields') == {'last_login'}:
+        handle_user_login(instance)
+        return
+    
+    invalidate_profile_etags(instance)
+    
     if created:
-        NotificationPreference.objects.get_or_create(user=instance)
-        logger.info(f"Created notification preferences for user {instance.username}")
+        create_user_notification_preferences(instance)
+        instance._old_role = instance.role
+        return
+    
+    handle_user_role_change(instance)
+
+
+def invalidate_profile_etags(instance):
+    """
+    Bump the progress versions of every student whose payloads nest this
+    user's profile: the user, their parent (children list) and their children
+    (parent dashboards).
+    """
+    student_ids = {instance.pk, *User.objects.filter(parent_id=instance.pk).values_list('id', flat=True)}
+    if instance.parent_id:
+        student_ids.add(instance.parent_id)
+    for student_id in student_ids:
+        transaction.on_commit(partial(bump_progress_version, student_id))
 
 
-@receiver(post_save, sender=StudentProgress)
+def create_user_notification_preferences(instance):
+    """Create notification preferences when a new user is created"""
+    NotificationPreference.objects.get_or_create(user=instance)
+    logger.info("Created notification preferences for user %s", instance.username)
+
+
+def _fields_touched(kwargs, fields):
+    """False for a partial save whose update_fields leave all of fields alone"""
+    update_fields = kwargs.get('update_fields')
+    return update_fields is None or not update_fields.isdisjoint(fields)
+
+
+def _load_lesson_context(instance, lesson_id):
+    """
+    Lesson with its chapter and subject fetched in one query, cached on the
+    saved instance so each handler pays for it at most once.
+    """
+    ctx = getattr(instance, '_lesson_ctx', None)
+    if ctx is None:
+        ctx = Lesson.objects.select_related('chapter__subject').only(
+            'title', 'content_type', 'chapter__subject__name', 'chapter__subject__grade_level'
+        ).get(pk=lesson_id)
+        instance._lesson_ctx = ctx
+    return ctx
+
+
+@receiver(post_save, sender=StudentProgress, dispatch_uid='apps.signals.handle_lesson_progress_update')
 def handle_lesson_progress_update(sender, instance, created, **kwargs):
     """Handle lesson progress updates"""
+    if not _fields_touched(kwargs, {'status', 'score', 'completed_at'}):
+        return
+    
     if instance.status == 'COMPLETED':
-        # Update learning streak
-        update_learning_streaks.delay()
-        
-        # Check for milestones
-        check_and_create_milestones.delay()
-        
-        # Update subject progress
-        update_subject_progress.delay()
+        lesson = _load_lesson_context(instance, instance.lesson_id)
         
-        # Update grade progress
-        update_grade_progress.delay()
+        # Update streak, milestones and subject/grade progress, coalesced
+        # into one task per request
+        mark_student_dirty(instance.student_id, [lesson.chapter.subject_id])
         
         # Create analytics record
-        Analytics.objects.create(
+        record_analytics(
             student=instance.student,
-            lesson=instance.lesson,
+            lesson=lesson,
             metric_type='lesson_completion',
             metric_value=1,
             metadata={
-                'lesson_title': instance.lesson.title,
-                'subject': instance.lesson.chapter.subject.name,
-                'grade_level': instance.lesson.chapter.subject.grade_level,
+                'lesson_title': lesson.title,
+                'subject': lesson.chapter.subject.name,
+                'grade_level': lesson.chapter.subject.grade_level,
                 'score': instance.score,
                 'time_spent': instance.time_spent
             }
@@ -70,30 +129,33 @@ def handle_lesson_progress_update(sender, instance, created, **kwargs):
             notification = Notification.objects.create(
                 user=instance.student,
                 title="Great job!",
-                message=f"You completed {instance.lesson.title} with a score of {instance.score}%!",
+                message=f"You completed {lesson.title} with a score of {instance.score}%!",
                 notification_type='LESSON_COMPLETED',
                 priority='MEDIUM',
                 data={
-                    'lesson_id': instance.lesson.id,
+                    'lesson_id': instance.lesson_id,
                     'score': instance.score
                 }
             )
             
             # Send email notification
-            send_notification_email.delay(instance.student.id, notification.id)
+            transaction.on_commit(partial(send_notification_email.delay, instance.student_id, notification.id))
         
-        logger.info(f"Lesson progress updated: {instance.student.username} - {instance.lesson.title}")
+        logger.info("Lesson progress updated: %s - %s", instance.student.username, lesson.title)
 
 
-@receiver(post_save, sender=QuizAttempt)
+@receiver(post_save, sender=QuizAttempt, dispatch_uid='apps.signals.handle_quiz_attempt_completion')
 def handle_quiz_attempt_completion(sender, instance, created, **kwargs):
     """Handle quiz attempt completion"""
+    if not _fields_touched(kwargs, {'completed_at', 'score', 'is_passed'}):
+        return
+    
     if instance.completed_at and not created:
         # Update quiz analytics
-        update_quiz_analytics.delay()
+        transaction.on_commit(update_quiz_analytics.delay)
         
         # Create analytics record
-        Analytics.objects.create(
+        record_analytics(
             student=instance.student,
             quiz=instance.quiz,
             metric_type='quiz_completion',
@@ -137,17 +199,17 @@ def handle_quiz_attempt_completion(sender, instance, created, **kwargs):
             )
         
         # Send email notification
-        send_notification_email.delay(instance.student.id, notification.id)
+        transaction.on_commit(partial(send_notification_email.delay, instance.student_id, notification.id))
         
-        logger.info(f"Quiz attempt completed: {instance.student.username} - {instance.quiz.title}")
+        logger.info("Quiz attempt completed: %s - %s", instance.student.username, instance.quiz.title)
 
 
-@receiver(post_save, sender=ProgressMilestone)
+@receiver(post_save, sender=ProgressMilestone, dispatch_uid='apps.signals.handle_milestone_achievement')
 def handle_milestone_achievement(sender, instance, created, **kwargs):
     """Handle milestone achievement"""
     if created:
         # Create analytics record
-        Analytics.objects.create(
+        record_analytics(
             student=instance.student,
             metric_type='achievement_unlocked',
             metric_value=1,
@@ -173,17 +235,16 @@ def handle_milestone_achievement(sender, instance, created, **kwargs):
         )
         
         # Send email notification
-        send_notification_email.delay(instance.student.id, notification.id)
+        transaction.on_commit(partial(send_notification_email.delay, instance.student_id, notification.id))
         
-        logger.info(f"Milestone achieved: {instance.student.username} - {instance.title}")
+        logger.info("Milestone achieved: %s - %s", instance.student.username, instance.title)
 
 
-@receiver(post_save, sender=User)
-def handle_user_login(sender, instance, created, **kwargs):
-    """Handle user login (when last_login is updated)"""
-    if not created and instance.last_login:
+def handle_user_login(instance):
+    """Handle user login (when only last_login is updated)"""
+    if instance.last_login:
         # Create analytics record
-        Analytics.objects.create(
+        record_analytics(
             student=instance if instance.is_student() else None,
             teacher=instance if instance.is_teacher() else None,
             parent=instance if instance.is_parent() else None,
@@ -197,38 +258,40 @@ def handle_user_login(sender, instance, created, **kwargs):
         
         # Update learning streak for students
         if instance.is_student():
-            update_learning_streaks.delay()
+            mark_student_dirty(instance.id, full=False)
         
-        logger.info(f"User login recorded: {instance.username}")
+        logger.info("User login recorded: %s", instance.username)
 
 
-@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Lesson, dispatch_uid='apps.signals.handle_lesson_creation')
 def handle_lesson_creation(sender, instance, created, **kwargs):
     """Handle lesson creation"""
     if created:
+        subject = _load_lesson_context(instance, instance.pk).chapter.subject
+        
         # Create analytics record
-        Analytics.objects.create(
-            teacher=instance.chapter.subject.created_by if hasattr(instance.chapter.subject, 'created_by') else None,
+        record_analytics(
+            teacher=subject.created_by if hasattr(subject, 'created_by') else None,
             lesson=instance,
             metric_type='content_created',
             metric_value=1,
             metadata={
                 'lesson_title': instance.title,
                 'content_type': instance.content_type,
-                'subject': instance.chapter.subject.name,
-                'grade_level': instance.chapter.subject.grade_level
+                'subject': subject.name,
+                'grade_level': subject.grade_level
             }
         )
         
-        logger.info(f"Lesson created: {instance.title}")
+        logger.info("Lesson created: %s", instance.title)
 
 
-@receiver(post_save, sender=Quiz)
+@receiver(post_save, sender=Quiz, dispatch_uid='apps.signals.handle_quiz_creation')
 def handle_quiz_creation(sender, instance, created, **kwargs):
     """Handle quiz creation"""
     if created:
         # Create analytics record
-        Analytics.objects.create(
+        record_analytics(
             teacher=instance.created_by,
             quiz=instance,
             metric_type='content_created',
@@ -237,19 +300,40 @@ def handle_quiz_creation(sender, instance, created, **kwargs):
                 'quiz_title': instance.title,
                 'subject': instance.subject.name,
                 'grade_level': instance.grade_level,
-                'question_count': instance.questions.count()
+                'question_count': instance.active_question_count
             }
         )
         
-        logger.info(f"Quiz created: {instance.title}")
+        logger.info("Quiz created: %s", instance.title)
+
+
+@receiver(post_save, sender=Quiz, dispatch_uid='apps.signals.invalidate_active_quiz_count')
+@receiver(post_delete, sender=Quiz, dispatch_uid='apps.signals.invalidate_active_quiz_count')
+def invalidate_active_quiz_count(sender, instance, **kwargs):
+    """Drop the cached active quiz count so quiz_stats recounts"""
+    transaction.on_commit(partial(cache.delete, ACTIVE_QUIZ_COUNT_KEY))
+
 
+@receiver(post_save, sender=Question, dispatch_uid='apps.signals.refresh_quiz_question_totals')
+@receiver(post_delete, sender=Question, dispatch_uid='apps.signals.refresh_quiz_question_totals')
+def refresh_quiz_question_totals(sender, instance, **kwargs):
+    """Keep the quiz's denormalized question totals and cached question order current"""
+    Quiz.objects.filter(pk=instance.quiz_id).refresh_question_totals()
+    transaction.on_commit(partial(cache.delete, QUESTION_IDS_CACHE_KEY.format(instance.quiz_id)))
 
-@receiver(post_save, sender=Subject)
+
+@receiver(post_save, sender=QuizAnalytics, dispatch_uid='apps.signals.invalidate_quiz_analytics_cache')
+def invalidate_quiz_analytics_cache(sender, instance, **kwargs):
+    """Drop the cached analytics response once refreshed analytics are saved"""
+    transaction.on_commit(partial(cache.delete, QUIZ_ANALYTICS_CACHE_KEY.format(instance.quiz_id)))
+
+
+@receiver(post_save, sender=Subject, dispatch_uid='apps.signals.handle_subject_creation')
 def handle_subject_creation(sender, instance, created, **kwargs):
     """Handle subject creation"""
     if created:
         # Create analytics record
-        Analytics.objects.create(
+        record_analytics(
             teacher=instance.created_by if hasattr(instance, 'created_by') else None,
             subject=instance,
             metric_type='content_created',
@@ -261,42 +345,63 @@ def handle_subject_creation(sender, instance, created, **kwargs):
             }
         )
         
-        logger.info(f"Subject created: {instance.name}")
+        logger.info("Subject created: %s", instance.name)
 
 
-@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=User, dispatch_uid='apps.signals.handle_user_deletion')
 def handle_user_deletion(sender, instance, **kwargs):
     """Handle user deletion"""
     # Clean up related data
-    logger.info(f"User deleted: {instance.username}")
+    logger.info("User deleted: %s", instance.username)
     
     # Note: Django's CASCADE will handle most related data deletion
     # This is just for logging and any additional cleanup needed
 
 
-@receiver(post_save, sender=Notification)
-def handle_notification_creation(sender, instance, created, **kwargs):
-    """Handle notification creation"""
+@receiver(post_save, sender=Notification, dispatch_uid='apps.signals.handle_notification_change')
+def handle_notification_change(sender, instance, created, **kwargs):
+    """Keep the user's cached unread count in step with notification changes"""
     if created:
-        # Update user's unread count in cache
-        cache_key = f"unread_count_{instance.user.id}"
-        cache.delete(cache_key)
+        if not instance.is_read:
+            transaction.on_commit(partial(adjust_unread_count, instance.user_id, 1))
+        
+        logger.info("Notification created: %s - %s", instance.user.username, instance.title)
+    
+    elif instance.is_read and _fields_touched(kwargs, {'is_read'}):
+        # Only a partial save naming is_read (as mark_as_read does) is a known
+        # unread -> read transition; recount after full saves
+        if kwargs.get('update_fields') is None:
+            transaction.on_commit(partial(cache.delete, UNREAD_COUNT_CACHE_KEY.format(instance.user_id)))
+        else:
+            transaction.on_commit(partial(adjust_unread_count, instance.user_id, -1))
         
-        logger.info(f"Notification created: {instance.user.username} - {instance.title}")
+        logger.info("Notification read: %s - %s", instance.user.username, instance.title)
 
 
-@receiver(post_save, sender=Notification)
-def handle_notification_read(sender, instance, created, **kwargs):
-    """Handle notification read status change"""
-    if not created and instance.is_read:
-        # Update user's unread count in cache
-        cache_key = f"unread_count_{instance.user.id}"
-        cache.delete(cache_key)
-        
-        logger.info(f"Notification read: {instance.user.username} - {instance.title}")
+@receiver(post_save, sender=StudentProgress, dispatch_uid='apps.signals.invalidate_progress_etag')
+@receiver(post_save, sender=LearningStreak, dispatch_uid='apps.signals.invalidate_progress_etag')
+@receiver(post_save, sender=SubjectProgress, dispatch_uid='apps.signals.invalidate_progress_etag')
+@receiver(post_save, sender=GradeProgress, dispatch_uid='apps.signals.invalidate_progress_etag')
+@receiver(post_save, sender=ProgressMilestone, dispatch_uid='apps.signals.invalidate_progress_etag')
+@receiver(post_save, sender=QuizAttempt, dispatch_uid='apps.signals.invalidate_progress_etag')
+@receiver(post_delete, sender=StudentProgress, dispatch_uid='apps.signals.invalidate_progress_etag')
+@receiver(post_delete, sender=ProgressMilestone, dispatch_uid='apps.signals.invalidate_progress_etag')
+@receiver(post_delete, sender=QuizAttempt, dispatch_uid='apps.signals.invalidate_progress_etag')
+def invalidate_progress_etag(sender, instance, **kwargs):
+    """Bump the student's progress version so cached progress views revalidate"""
+    transaction.on_commit(partial(bump_progress_version, instance.student_id))
+
 
+@receiver(post_save, sender=Subject, dispatch_uid='apps.signals.invalidate_shared_progress_etag')
+@receiver(post_save, sender=School, dispatch_uid='apps.signals.invalidate_shared_progress_etag')
+@receiver(post_delete, sender=Subject, dispatch_uid='apps.signals.invalidate_shared_progress_etag')
+@receiver(post_delete, sender=School, dispatch_uid='apps.signals.invalidate_shared_progress_etag')
+def invalidate_shared_progress_etag(sender, instance, **kwargs):
+    """Subjects and schools are nested into every student's progress payloads"""
+    transaction.on_commit(bump_shared_progress_version)
 
-@receiver(pre_save, sender=StudentProgress)
+
+@receiver(pre_save, sender=StudentProgress, dispatch_uid='apps.signals.validate_lesson_progress')
 def validate_lesson_progress(sender, instance, **kwargs):
     """Validate lesson progress before saving"""
     if instance.status == 'COMPLETED' and not instance.completed_at:
@@ -306,30 +411,15 @@ def validate_lesson_progress(sender, instance, **kwargs):
         instance.started_at = timezone.now()
 
 
-@receiver(pre_save, sender=QuizAttempt)
-def validate_quiz_attempt(sender, instance, **kwargs):
-    """Validate quiz attempt before saving"""
-    if instance.completed_at and not instance.score:
-        # Calculate score if not set
-        total_points = sum(q.points for q in instance.quiz.questions.filter(is_active=True))
-        earned_points = sum(answer.points_earned for answer in instance.answers.all())
-        
-        if total_points > 0:
-            instance.score = (earned_points / total_points) * 100
-            instance.is_passed = instance.score >= instance.quiz.passing_score
-
-
-@receiver(post_save, sender=LearningStreak)
+@receiver(post_save, sender=LearningStreak, dispatch_uid='apps.signals.handle_streak_update')
 def handle_streak_update(sender, instance, created, **kwargs):
     """Handle learning streak updates"""
-    if not created and instance.current_streak > 0:
-        # Check for streak milestones
-        if instance.current_streak == 7:
-            create_streak_milestone(instance.student, 7)
-        elif instance.current_streak == 30:
-            create_streak_milestone(instance.student, 30)
-        elif instance.current_streak == 100:
-            create_streak_milestone(instance.student, 100)
+    # Most daily saves land between milestones; bail out before any other work
+    if created or instance.current_streak not in STREAK_MILESTONE_DAYS:
+        return
+    
+    if _fields_touched(kwargs, {'current_streak'}):
+        create_streak_milestone(instance.student, instance.current_streak)
 
 
 def create_streak_milestone(student, streak_days):
@@ -345,13 +435,13 @@ def create_streak_milestone(student, streak_days):
     )
     
     if created:
-        logger.info(f"Streak milestone created: {student.username} - {streak_days} days")
+        logger.info("Streak milestone created: %s - %s days", student.username, streak_days)
 
 
-@receiver(post_save, sender=SubjectProgress)
+@receiver(post_save, sender=SubjectProgress, dispatch_uid='apps.signals.handle_subject_progress_update')
 def handle_subject_progress_update(sender, instance, created, **kwargs):
     """Handle subject progress updates"""
-    if not created:
+    if not created and _fields_touched(kwargs, {'completed_lessons', 'total_lessons'}):
         # Check if subject is completed (80%+ completion)
         if instance.total_lessons > 0:
             completion_rate = (instance.completed_lessons / instance.total_lessons) * 100
@@ -372,13 +462,13 @@ def handle_subject_progress_update(sender, instance, created, **kwargs):
                 )
                 
                 if created:
-                    logger.info(f"Subject completion milestone: {instance.student.username} - {instance.subject.name}")
+                    logger.info("Subject completion milestone: %s - %s", instance.student.username, instance.subject.name)
 
 
-@receiver(post_save, sender=GradeProgress)
+@receiver(post_save, sender=GradeProgress, dispatch_uid='apps.signals.handle_grade_progress_update')
 def handle_grade_progress_update(sender, instance, created, **kwargs):
     """Handle grade progress updates"""
-    if not created:
+    if not created and _fields_touched(kwargs, {'completed_lessons', 'total_lessons'}):
         # Check if grade is completed (80%+ completion)
         if instance.total_lessons > 0:
             completion_rate = (instance.completed_lessons / instance.total_lessons) * 100
@@ -399,17 +489,17 @@ def handle_grade_progress_update(sender, instance, created, **kwargs):
                 )
                 
                 if created:
-                    logger.info(f"Grade completion milestone: {instance.student.username} - Grade {instance.grade_level}")
+                    logger.info("Grade completion milestone: %s - Grade %s", instance.student.username, instance.grade_level)
 
 
 # Additional signal handlers for specific functionality
 
-@receiver(post_save, sender=QuizResult)
+@receiver(post_save, sender=QuizResult, dispatch_uid='apps.signals.handle_quiz_result_creation')
 def handle_quiz_result_creation(sender, instance, created, **kwargs):
     """Handle quiz result creation"""
     if created:
         # Create analytics record for detailed quiz results
-        Analytics.objects.create(
+        record_analytics(
             student=instance.attempt.student,
             quiz=instance.attempt.quiz,
             metric_type='quiz_result_analysis',
@@ -422,22 +512,22 @@ def handle_quiz_result_creation(sender, instance, created, **kwargs):
             }
         )
         
-        logger.info(f"Quiz result created: {instance.attempt.student.username} - {instance.attempt.quiz.title}")
+        logger.info("Quiz result created: %s - %s", instance.attempt.student.username, instance.attempt.quiz.title)
 
 
-@receiver(post_save, sender=User)
-def handle_user_role_change(sender, instance, created, **kwargs):
+def handle_user_role_change(instance):
     """Handle user role changes"""
-    if not created:
+    old_role = getattr(instance, '_old_role', None)
+    if old_role is not None and old_role != instance.role:
         # Update analytics when user role changes
-        Analytics.objects.create(
+        record_analytics(
             student=instance if instance.is_student() else None,
             teacher=instance if instance.is_teacher() else None,
             parent=instance if instance.is_parent() else None,
             metric_type='role_change',
             metric_value=1,
             metadata={
-                'old_role': getattr(instance, '_old_role', None),
+                'old_role': old_role,
                 'new_role': instance.role,
                 'user_id': instance.id
             }
@@ -445,16 +535,3 @@ def handle_user_role_change(sender, instance, created, **kwargs):
         
         # Store old role for next save
         instance._old_role = instance.role
-
-
-@receiver(pre_save, sender=User)
-def store_old_role(sender, instance, **kwargs):
-    """Store old role before saving"""
-    if instance.pk:
-        try:
-            old_instance = User.objects.get(pk=instance.pk)
-            instance._old_role = old_instance.role
-        except User.DoesNotExist:
-            instance._old_role = None
-    else:
-        instance._old_role = None
@@ -6,7 +6,8 @@ from celery import shared_task
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
-from django.db.models import Q, Count, Avg, Sum
+from django.db.models import Q, Count, Avg, Sum, Prefetch
+from django.db.models.functions import Coalesce
 from datetime import timedelta, date
 import logging
 
@@ -57,9 +58,8 @@ def update_learning_streaks():
     try:
         students = User.objects.filter(role='STUDENT', is_active=True)
         
-        for student in students:
-            streak, created = LearningStreak.objects.get_or_create(student=student)
-            streak.update_streak()
+        for student in students.iterator(chunk_size=500):
+            update_student_streak(student)
         
         logger.info(f"Updated learning streaks for {students.count()} students")
         
@@ -67,62 +67,77 @@ def update_learning_streaks():
         logger.error(f"Failed to update learning streaks: {str(e)}")
 
 
+def update_student_streak(student):
+    """Update a single student's learning streak"""
+    streak, created = LearningStreak.objects.get_or_create(student=student)
+    streak.update_streak()
+    return streak
+
+
 @shared_task
 def check_and_create_milestones():
     """Check and create milestones for all students"""
     try:
-        students = User.objects.filter(role='STUDENT', is_active=True)
+        students = User.objects.filter(role='STUDENT', is_active=True).prefetch_related(
+            Prefetch('learning_streaks', queryset=LearningStreak.objects.order_by('pk'), to_attr='streaks')
+        )
         
-        for student in students:
-            # Check lesson completion milestones
-            completed_lessons = StudentProgress.objects.filter(
-                student=student,
-                status='COMPLETED'
-            ).count()
-            
-            if completed_lessons == 1:
-                create_milestone_if_not_exists(
-                    student, 'LESSON_COMPLETION',
-                    'First Lesson Completed!',
-                    'Congratulations on completing your first lesson!'
-                )
-            elif completed_lessons == 10:
-                create_milestone_if_not_exists(
-                    student, 'LESSON_COMPLETION',
-                    '10 Lessons Completed!',
-                    'Amazing! You\'ve completed 10 lessons. Keep up the great work!'
-                )
-            elif completed_lessons == 50:
-                create_milestone_if_not_exists(
-                    student, 'LESSON_COMPLETION',
-                    '50 Lessons Completed!',
-                    'Outstanding! You\'ve completed 50 lessons. You\'re a learning champion!'
-                )
-            
-            # Check streak milestones
-            try:
-                streak = LearningStreak.objects.get(student=student)
-                if streak.current_streak == 7:
-                    create_milestone_if_not_exists(
-                        student, 'STREAK_ACHIEVEMENT',
-                        '7-Day Learning Streak!',
-                        'Fantastic! You\'ve maintained a 7-day learning streak!'
-                    )
-                elif streak.current_streak == 30:
-                    create_milestone_if_not_exists(
-                        student, 'STREAK_ACHIEVEMENT',
-                        '30-Day Learning Streak!',
-                        'Incredible! You\'ve maintained a 30-day learning streak!'
-                    )
-            except LearningStreak.DoesNotExist:
-                pass
-        
-        logger.info(f"Checked milestones for {students.count()} students")
+        checked = 0
+        for student in students.iterator(chunk_size=500):
+            streak = student.streaks[0] if student.streaks else None
+            check_student_milestones(student, streak)
+            checked += 1
+        
+        logger.info(f"Checked milestones for {checked} students")
         
     except Exception as e:
         logger.error(f"Failed to check milestones: {str(e)}")
 
 
+def check_student_milestones(student, streak=None):
+    """Create lesson-count and streak milestones a student has just reached"""
+    # Check lesson completion milestones
+    completed_lessons = StudentProgress.objects.filter(
+        student=student,
+        status='COMPLETED'
+    ).count()
+    
+    if completed_lessons == 1:
+        create_milestone_if_not_exists(
+            student, 'LESSON_COMPLETION',
+            'First Lesson Completed!',
+            'Congratulations on completing your first lesson!'
+        )
+    elif completed_lessons == 10:
+        create_milestone_if_not_exists(
+            student, 'LESSON_COMPLETION',
+            '10 Lessons Completed!',
+            'Amazing! You\'ve completed 10 lessons. Keep up the great work!'
+        )
+    elif completed_lessons == 50:
+        create_milestone_if_not_exists(
+            student, 'LESSON_COMPLETION',
+            '50 Lessons Completed!',
+            'Outstanding! You\'ve completed 50 lessons. You\'re a learning champion!'
+        )
+    
+    # Check streak milestones
+    if streak is None:
+        return
+    if streak.current_streak == 7:
+        create_milestone_if_not_exists(
+            student, 'STREAK_ACHIEVEMENT',
+            '7-Day Learning Streak!',
+            'Fantastic! You\'ve maintained a 7-day learning streak!'
+        )
+    elif streak.current_streak == 30:
+        create_milestone_if_not_exists(
+            student, 'STREAK_ACHIEVEMENT',
+            '30-Day Learning Streak!',
+            'Incredible! You\'ve maintained a 30-day learning streak!'
+        )
+
+
 def create_milestone_if_not_exists(student, milestone_type, title, description):
     """Create milestone if it doesn't already exist"""
     milestone, created = ProgressMilestone.objects.get_or_create(
@@ -158,15 +173,9 @@ def update_subject_progress():
     try:
         students = User.objects.filter(role='STUDENT', is_active=True)
         
-        for student in students:
+        for student in students.iterator(chunk_size=500):
             subjects = Subject.objects.filter(grade_level=student.grade_level)
-            
-            for subject in subjects:
-                progress, created = SubjectProgress.objects.get_or_create(
-                    student=student,
-                    subject=subject
-                )
-                progress.calculate_progress()
+            update_student_subject_progress(student, subjects)
         
         logger.info(f"Updated subject progress for {students.count()} students")
         
@@ -174,18 +183,24 @@ def update_subject_progress():
         logger.error(f"Failed to update subject progress: {str(e)}")
 
 
+def update_student_subject_progress(student, subjects):
+    """Recalculate a student's progress in each of the given subjects"""
+    for subject in subjects:
+        progress, created = SubjectProgress.objects.get_or_create(
+            student=student,
+            subject=subject
+        )
+        progress.calculate_progress()
+
+
 @shared_task
 def update_grade_progress():
     """Update grade progress for all students"""
     try:
         students = User.objects.filter(role='STUDENT', is_active=True, grade_level__isnull=False)
         
-        for student in students:
-            progress, created = GradeProgress.objects.get_or_create(
-                student=student,
-                grade_level=student.grade_level
-            )
-            progress.calculate_grade_progress()
+        for student in students.iterator(chunk_size=500):
+            update_student_grade_progress(student)
         
         logger.info(f"Updated grade progress for {students.count()} students")
         
@@ -193,6 +208,52 @@ def update_grade_progress():
         logger.error(f"Failed to update grade progress: {str(e)}")
 
 
+def update_student_grade_progress(student):
+    """Recalculate a student's progress in their current grade"""
+    progress, created = GradeProgress.objects.get_or_create(
+        student=student,
+        grade_level=student.grade_level
+    )
+    progress.calculate_grade_progress()
+
+
+@shared_task
+def process_progress_updates(updates):
+    """
+    Apply the streak, milestone, subject and grade updates for the students
+    whose progress changed during one request.
+    
+    updates holds [student_id, full, subject_ids] entries. Every student gets
+    their streak refreshed; full updates also check milestones and
+    recalculate the listed subjects and the student's grade.
+    """
+    try:
+        pending = {student_id: (full, subject_ids) for student_id, full, subject_ids in updates}
+        students = User.objects.filter(id__in=pending, role='STUDENT', is_active=True)
+        subjects = Subject.objects.in_bulk(
+            {subject_id for full, subject_ids in pending.values() for subject_id in subject_ids}
+        )
+        
+        for student in students:
+            full, subject_ids = pending[student.id]
+            streak = update_student_streak(student)
+            if not full:
+                continue
+            
+            check_student_milestones(student, streak)
+            update_student_subject_progress(
+                student, [subjects[subject_id] for subject_id in subject_ids if subject_id in subjects]
+            )
+            
+            if student.grade_level is not None:
+                update_student_grade_progress(student)
+        
+        logger.info(f"Processed progress updates for {len(pending)} students")
+        
+    except Exception as e:
+        logger.error(f"Failed to process progress updates: {str(e)}")
+
+
 @shared_task
 def generate_daily_analytics():
     """Generate daily analytics data"""
@@ -429,16 +490,17 @@ def generate_weekly_report(student):
         completed_at__date__range=[week_start, week_end]
     )
     
-    lessons_completed = week_progress.filter(status='COMPLETED').count()
-    time_spent = week_progress.aggregate(total_time=Sum('time_spent'))['total_time'] or 0
+    totals = week_progress.aggregate(
+        lessons_completed=Count('id', filter=Q(status='COMPLETED')),
+        total_time=Coalesce(Sum('time_spent'), 0),
+        average_score=Coalesce(Avg('score'), 0.0)
+    )
     
     # Create report
     report_data = {
-        'lessons_completed': lessons_completed,
-        'time_spent': time_spent,
-        'average_score': week_progress.filter(
-            score__isnull=False
-        ).aggregate(avg_score=Avg('score'))['avg_score'] or 0,
+        'lessons_completed': totals['lessons_completed'],
+        'time_spent': totals['total_time'],
+        'average_score': totals['average_score'],
         'daily_activity': {}
     }
     
@@ -456,7 +518,7 @@ def generate_weekly_report(student):
         report_type='WEEKLY',
         period_start=week_start,
         period_end=week_end,
-        data=report_data
+        payload=report_data
     )
 
 
@@ -477,16 +539,17 @@ def generate_monthly_report(student):
         completed_at__date__range=[prev_month_start, month_start - timedelta(days=1)]
     )
     
-    lessons_completed = month_progress.filter(status='COMPLETED').count()
-    time_spent = month_progress.aggregate(total_time=Sum('time_spent'))['total_time'] or 0
+    totals = month_progress.aggregate(
+        lessons_completed=Count('id', filter=Q(status='COMPLETED')),
+        total_time=Coalesce(Sum('time_spent'), 0),
+        average_score=Coalesce(Avg('score'), 0.0)
+    )
     
     # Create report
     report_data = {
-        'lessons_completed': lessons_completed,
-        'time_spent': time_spent,
-        'average_score': month_progress.filter(
-            score__isnull=False
-        ).aggregate(avg_score=Avg('score'))['avg_score'] or 0,
+        'lessons_completed': totals['lessons_completed'],
+        'time_spent': totals['total_time'],
+        'average_score': totals['average_score'],
         'subject_breakdown': {},
         'milestones_achieved': []
     }
@@ -518,7 +581,7 @@ def generate_monthly_report(student):
         report_type='MONTHLY',
         period_start=prev_month_start,
         period_end=month_start - timedelta(days=1),
-        data=report_data
+        payload=report_data
     )
 
 
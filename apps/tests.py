@@ -1,15 +1,19 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from .accounts.models import School
 from .content.models import Subject, Chapter, Lesson
-from .quizzes.models import Quiz, Question, QuizAttempt
-from .progress.models import StudentProgress
-from .notifications.models import Notification
+from .quizzes.models import Quiz, Question, QuizAttempt, QuizSession
+from .progress.models import StudentProgress, percentage
+from .notifications.models import Notification, UNREAD_COUNT_CACHE_KEY, adjust_unread_count, get_unread_count
+from .progress.coalesce import start_collecting, end_collecting, mark_student_dirty
+from .progress.serializers import StudentProgressSerializer, progress_percentage_expression
+from unittest import mock
 import json
 
 User = get_user_model()
@@ -551,3 +555,456 @@ class WebhookTestCase(APITestCase):
         }
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class LearningFixturesMixin:
+    """
+    Shared student, subject, chapter and lesson for the test cases below.
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        self.student = User.objects.create_user(
+            username='teststudent',
+            email='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='STUDENT',
+            student_id='S12345',
+            grade_level=1
+        )
+        self.subject = Subject.objects.create(
+            name="Mathematics",
+            description="Basic mathematics concepts",
+            grade_level=1
+        )
+        self.chapter = Chapter.objects.create(
+            title="Addition",
+            description="Learning basic addition",
+            subject=self.subject,
+            estimated_duration=60
+        )
+        self.lesson = Lesson.objects.create(
+            title="Adding Numbers",
+            content="Learn how to add numbers",
+            content_type="VIDEO",
+            duration=15,
+            chapter=self.chapter
+        )
+
+
+class ProgressUpdateCoalescingTestCase(LearningFixturesMixin, APITransactionTestCase):
+    """
+    Test that progress recomputes are queued once per request.
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        self.client.force_authenticate(user=self.student)
+    
+    @mock.patch('apps.progress.coalesce.process_progress_updates.delay')
+    def test_lesson_completion_queues_one_task(self, delay):
+        """Completing a lesson queues a single recompute for its subject."""
+        url = reverse('progress:update_lesson_progress', kwargs={'lesson_id': self.lesson.pk})
+        response = self.client.post(url, {'action': 'complete', 'score': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        delay.assert_called_once_with([[self.student.pk, True, [self.subject.pk]]])
+    
+    @mock.patch('apps.progress.coalesce.process_progress_updates.delay')
+    def test_marks_merge_per_student(self, delay):
+        """Repeated marks for a student collapse into one entry."""
+        start_collecting()
+        mark_student_dirty(self.student.pk, full=False)
+        mark_student_dirty(self.student.pk, [self.subject.pk])
+        mark_student_dirty(self.student.pk, [self.subject.pk])
+        end_collecting()
+        
+        delay.assert_called_once_with([[self.student.pk, True, [self.subject.pk]]])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class QuizSessionFlowTestCase(LearningFixturesMixin, APITestCase):
+    """
+    Test the submit -> complete flow of a quiz session.
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        self.teacher = User.objects.create_user(
+            username='testteacher',
+            email='teacher@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Teacher',
+            role='TEACHER',
+            teacher_id='T12345'
+        )
+        self.quiz = Quiz.objects.create(
+            title="Math Quiz",
+            description="Test your math skills",
+            subject=self.subject,
+            grade_level=1,
+            time_limit=30,
+            max_attempts=3,
+            passing_score=70,
+            created_by=self.teacher
+        )
+        self.first_question = Question.objects.create(
+            quiz=self.quiz,
+            question_text="What is 2 + 2?",
+            question_type="MULTIPLE_CHOICE",
+            options=["3", "4", "5", "6"],
+            correct_answer="4",
+            points=1,
+            order_index=1
+        )
+        self.second_question = Question.objects.create(
+            quiz=self.quiz,
+            question_text="Is 3 greater than 2?",
+            question_type="TRUE_FALSE",
+            correct_answer="true",
+            points=1,
+            order_index=2
+        )
+        self.client.force_authenticate(user=self.student)
+        
+        response = self.client.post(reverse('quizzes:start_attempt'), {'quiz': self.quiz.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.session = QuizSession.objects.get(student=self.student, quiz=self.quiz)
+    
+    def submit(self, question, answer_text):
+        url = reverse('quizzes:submit_answer', kwargs={'session_key': self.session.session_key})
+        return self.client.post(url, {'question_id': question.pk, 'answer_text': answer_text}, format='json')
+    
+    def test_session_is_linked_to_attempt(self):
+        """Starting an attempt links the session to it."""
+        self.assertEqual(self.session.attempt, QuizAttempt.objects.get(student=self.student, quiz=self.quiz))
+    
+    def test_submit_then_complete(self):
+        """Answering every question completes and scores the attempt."""
+        response = self.submit(self.first_question, '4')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_completed'])
+        self.assertEqual(response.data['next_question_index'], 1)
+        
+        response = self.submit(self.second_question, 'true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_completed'])
+        
+        attempt = QuizAttempt.objects.get(pk=self.session.attempt_id)
+        self.assertIsNotNone(attempt.completed_at)
+        self.assertEqual(attempt.score, 100)
+        self.assertFalse(QuizSession.objects.get(pk=self.session.pk).is_active)
+    
+    def test_submits_set_one_answers_data_key_each(self):
+        """Each submit adds its own answers_data key and completion keeps them all."""
+        QuizSession.objects.filter(pk=self.session.pk).update(answers_data={'client': 'kept'})
+        
+        self.assertEqual(self.submit(self.first_question, '3').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.submit(self.second_question, 'true').status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(QuizSession.objects.get(pk=self.session.pk).answers_data, {
+            'client': 'kept',
+            str(self.first_question.pk): {'answer': '3', 'is_correct': False, 'time_spent': 0},
+            str(self.second_question.pk): {'answer': 'true', 'is_correct': True, 'time_spent': 0},
+        })
+    
+    def test_duplicate_submit_does_not_skip_question(self):
+        """A second submit validated against the same index is rejected."""
+        stale_session = QuizSession.objects.get(pk=self.session.pk)
+        self.assertEqual(self.submit(self.first_question, '4').status_code, status.HTTP_200_OK)
+        
+        with mock.patch('apps.quizzes.views.get_active_session', return_value=stale_session):
+            response = self.submit(self.first_question, '3')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        session = QuizSession.objects.get(pk=self.session.pk)
+        self.assertEqual(session.current_question_index, 1)
+        self.assertEqual(session.answers_data, {
+            str(self.first_question.pk): {'answer': '4', 'is_correct': True, 'time_spent': 0}
+        })
+
+
+class QuizQuestionTotalsTestCase(LearningFixturesMixin, TestCase):
+    """
+    Test the denormalized question totals on Quiz.
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        self.quiz = Quiz.objects.create(
+            title="Math Quiz",
+            subject=self.subject,
+            grade_level=1
+        )
+    
+    def add_question(self, points):
+        return Question.objects.create(
+            quiz=self.quiz,
+            question_text="What is 2 + 2?",
+            question_type="MULTIPLE_CHOICE",
+            options=["3", "4", "5", "6"],
+            correct_answer="4",
+            points=points
+        )
+    
+    def test_adding_and_deactivating_questions_updates_totals(self):
+        """Test that question changes refresh active_question_count and total_points"""
+        first = self.add_question(points=2)
+        self.add_question(points=3)
+        
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.active_question_count, 2)
+        self.assertEqual(self.quiz.total_points, 5)
+        
+        first.is_active = False
+        first.save()
+        
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.active_question_count, 1)
+        self.assertEqual(self.quiz.total_points, 3)
+    
+    def test_quiz_save_keeps_refreshed_totals(self):
+        """Test that saving a stale Quiz instance does not reset the totals"""
+        stale_quiz = Quiz.objects.get(pk=self.quiz.pk)
+        self.add_question(points=4)
+        
+        stale_quiz.title = "Renamed Quiz"
+        stale_quiz.save()
+        
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.title, "Renamed Quiz")
+        self.assertEqual(self.quiz.active_question_count, 1)
+        self.assertEqual(self.quiz.total_points, 4)
+    
+    def test_deferred_quiz_save_skips_deferred_fields(self):
+        """Test that saving a quiz loaded with only() doesn't reload deferred fields"""
+        quiz = Quiz.objects.only('id', 'title').get(pk=self.quiz.pk)
+        quiz.title = "Renamed Quiz"
+        
+        with self.assertNumQueries(1):
+            quiz.save()
+        
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.title, "Renamed Quiz")
+
+
+class ProgressPercentageTestCase(LearningFixturesMixin, TestCase):
+    """
+    Test that list and detail views report the same progress percentage.
+    """
+    
+    def create_progress(self, content_type, duration, **fields):
+        lesson = Lesson.objects.create(
+            title=f"{content_type} lesson",
+            content="Learn how to add numbers",
+            content_type=content_type,
+            duration=duration,
+            chapter=self.chapter
+        )
+        return StudentProgress.objects.create(student=self.student, lesson=lesson, **fields)
+    
+    def test_annotated_percentage_matches_fallback(self):
+        """Test that the SQL annotation and the Python fallback agree"""
+        progress_rows = [
+            self.create_progress('VIDEO', 7, status='IN_PROGRESS', last_position=100),
+            self.create_progress('VIDEO', 3, status='IN_PROGRESS', last_position=500),
+            self.create_progress('SLIDES', 0, status='IN_PROGRESS', time_spent=200),
+            self.create_progress('SLIDES', 9, status='IN_PROGRESS', time_spent=45),
+            self.create_progress('TEXT', 5, status='IN_PROGRESS'),
+            self.create_progress('TEXT', 5, status='COMPLETED'),
+        ]
+        
+        annotated = StudentProgress.objects.filter(student=self.student).select_related('lesson').annotate(
+            annotated_progress_percentage=progress_percentage_expression()
+        ).in_bulk()
+        
+        for progress in progress_rows:
+            progress = StudentProgress.objects.select_related('lesson').get(pk=progress.pk)
+            detail = StudentProgressSerializer().get_progress_percentage(progress)
+            listed = StudentProgressSerializer().get_progress_percentage(annotated[progress.pk])
+            self.assertIsInstance(listed, float)
+            self.assertIsInstance(detail, float)
+            self.assertEqual(listed, detail)
+
+
+class PercentageTestCase(TestCase):
+    """
+    Test the integer percentage helper against the float rounding it replaced.
+    """
+    
+    def test_matches_float_rounding(self):
+        """Test that percentage() agrees with round(part / total * 100, 2)"""
+        for total in range(1, 301):
+            for part in range(total + 1):
+                remainder = part * 10000 % total
+                if 2 * remainder == total:
+                    # Exact ties round half up instead of following float error
+                    continue
+                self.assertEqual(percentage(part, total), round(part / total * 100, 2), (part, total))
+    
+    def test_rounds_instead_of_truncating(self):
+        """Test that the second decimal is rounded"""
+        self.assertEqual(percentage(2, 3), 66.67)
+        self.assertEqual(percentage(1, 3), 33.33)
+        self.assertEqual(percentage(1, 8), 12.5)
+        self.assertEqual(percentage(5, 0), 0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ProgressETagTestCase(LearningFixturesMixin, APITestCase):
+    """
+    Test ETag revalidation of the read-only progress endpoints.
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        cache.clear()
+        self.client.force_authenticate(user=self.student)
+        self.url = reverse('progress:progress_stats')
+    
+    def test_unchanged_progress_returns_not_modified(self):
+        """Test that a matching If-None-Match is answered with 304"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    @mock.patch('apps.progress.coalesce.process_progress_updates.delay')
+    def test_progress_change_changes_etag(self, delay):
+        """Test that saving progress makes the old ETag stale"""
+        etag = self.client.get(self.url)['ETag']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentProgress.objects.create(student=self.student, lesson=self.lesson, status='COMPLETED', score=80)
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['completed_lessons'], 1)
+    
+    def test_parent_dashboard_for_other_child_is_not_revalidated(self):
+        """Test that a parent can't get a 304 for a student who isn't their child"""
+        parent = User.objects.create_user(
+            username='testparent',
+            email='parent@test.com',
+            password='testpass123',
+            role='PARENT'
+        )
+        self.client.force_authenticate(user=parent)
+        url = reverse('progress:parent_dashboard', kwargs={'child_id': self.student.pk})
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', response)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CachedCountPaginationTestCase(LearningFixturesMixin, APITestCase):
+    """
+    Test that paginated progress lists reuse the count from the first page.
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        cache.clear()
+        self.client.force_authenticate(user=self.student)
+        self.url = reverse('progress:progress_list')
+        for index in range(21):
+            self.add_progress(index)
+    
+    def add_progress(self, index, status='IN_PROGRESS'):
+        lesson = Lesson.objects.create(
+            title=f"Lesson {index}",
+            content="Learn how to add numbers",
+            content_type="TEXT",
+            duration=5,
+            chapter=self.chapter
+        )
+        return StudentProgress.objects.create(student=self.student, lesson=lesson, status=status)
+    
+    def test_later_pages_reuse_cached_count(self):
+        """Test that only the first page recounts"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 21)
+        
+        self.add_progress(21)
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 21)
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 22)
+    
+    def test_filters_have_their_own_count(self):
+        """Test that a filtered listing doesn't reuse the unfiltered count"""
+        self.add_progress(21, status='COMPLETED')
+        self.assertEqual(self.client.get(self.url).data['count'], 22)
+        
+        response = self.client.get(self.url, {'status': 'COMPLETED'})
+        self.assertEqual(response.data['count'], 1)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class UnreadNotificationCountTestCase(LearningFixturesMixin, TestCase):
+    """
+    Test that the cached unread count is shifted in place by notification changes.
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        cache.clear()
+        self.cache_key = UNREAD_COUNT_CACHE_KEY.format(self.student.pk)
+    
+    def notify(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                user=self.student,
+                title="Lesson Completed",
+                message="You completed a lesson",
+                notification_type='LESSON_COMPLETED'
+            )
+        return notification
+    
+    def test_create_and_read_adjust_cached_count(self):
+        """Test that a new notification increments and mark_as_read decrements"""
+        unread = get_unread_count(self.student.pk)
+        
+        notification = self.notify()
+        self.assertEqual(cache.get(self.cache_key), unread + 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.mark_as_read()
+        self.assertEqual(cache.get(self.cache_key), unread)
+        self.assertEqual(get_unread_count(self.student.pk), unread)
+    
+    def test_missing_count_is_not_created(self):
+        """Test that adjusting an uncached count leaves it for the next read"""
+        adjust_unread_count(self.student.pk, 1)
+        self.assertIsNone(cache.get(self.cache_key))
+        
+        self.notify()
+        self.assertIsNone(cache.get(self.cache_key))
+        self.assertEqual(
+            get_unread_count(self.student.pk),
+            Notification.objects.filter(user=self.student, is_read=False).count()
+        )
+    
+    def test_bulk_mark_read_drops_cached_count(self):
+        """Test that mark_read() makes the next read recount"""
+        self.notify()
+        get_unread_count(self.student.pk)
+        
+        Notification.objects.filter(user=self.student).mark_read()
+        self.assertIsNone(cache.get(self.cache_key))
+        self.assertEqual(get_unread_count(self.student.pk), 0)
@@ -0,0 +1,35 @@
+"""
+Logging handlers for Learning Cloud.
+"""
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueuedStreamHandler(QueueHandler):
+    """
+    Stream handler whose writes happen on a background thread.
+
+    Request and worker threads only enqueue the record; a QueueListener
+    drains the queue into a StreamHandler. The listener is (re)started per
+    process, so forked Celery/Gunicorn workers get their own thread.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.stream = stream
+        self.listener = None
+        self._pid = None
+
+    def _start_listener(self):
+        self.listener = QueueListener(self.queue, logging.StreamHandler(self.stream))
+        self.listener.start()
+        self._pid = os.getpid()
+        atexit.register(self.listener.stop)
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
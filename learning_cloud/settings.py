@@ -70,6 +70,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.middleware.AnalyticsBufferMiddleware',
+    'apps.middleware.ProgressUpdateMiddleware',
 ]
 
 ROOT_URLCONF = 'learning_cloud.urls'
@@ -118,6 +120,15 @@ CACHES = {
     }
 }
 
+# ===========================
+# CELERY
+# ===========================
+# Notification emails are I/O bound, so they go to their own queue served by
+# a gevent worker instead of waiting behind progress and analytics tasks.
+CELERY_TASK_ROUTES = {
+    'apps.tasks.send_notification_email': {'queue': 'notifications_email'},
+}
+
 # ===========================
 # STATIC & MEDIA FILES
 # ===========================
@@ -210,7 +221,8 @@ LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
-        'console': {'class': 'logging.StreamHandler'},
+        # Records are written on a background thread, off the request path
+        'console': {'class': 'learning_cloud.log_handlers.QueuedStreamHandler'},
     },
     'root': {'handlers': ['console'], 'level': 'INFO'},
 }
@@ -58,7 +58,7 @@ urlpatterns = [
     path('api/', include('apps.accounts.urls')),
     path('api/', include('apps.content.urls')),
     path('api/', include('apps.quizzes.urls')),
-    path('api/', include('apps.progress.urls')),
+    path('api/progress/', include('apps.progress.urls')),
     path('api/', include('apps.analytics.urls')),
     path('api/', include('apps.notifications.urls')),
     